@@ -39,23 +39,41 @@ def live_process_video():
 
 # app.py
 import streamlit as st
-from PIL import Image
-import cv2
-import mediapipe as mp
-import numpy as np
 import os
-from datetime import datetime
 import tempfile
 from pathlib import Path
-import subprocess
-# Import exercise processors
-from exercises.uploaded_pushup_track import process_video as pushup_process_video
-from exercises.uploaded_deadlift_track import process_video as deadlift_process_video
-from exercises.uploaded_bicep_track import process_video as bicep_process_video
-from exercises.live_pushup_track import live_pushup_tracking as pushup_live_track
-from exercises.live_deadlift_track import live_deadlift_tracking as deadlift_live_track
-from exercises.live_bicep_track import live_bicep_tracking as bicep_live_track
-
+import shutil
+import time
+import uuid
+# Only light modules are imported up front. The exercise processors, and with them cv2, mediapipe and
+# requests, are loaded through the registry once a page needs them (see benchmarks/bench_startup.py)
+from exercises.profiling import JobProfiler, timed
+from exercises.jobs import JobQueue, MAX_CONCURRENT_JOBS
+from exercises.analysis_record import load_record, render_report
+from exercises.registry import load, exercise_specs, live_frames, registered_exercises
+
+# Worker processes per long upload, which is split into segments processed in parallel. The CPUs are shared
+# between the MAX_CONCURRENT_JOBS uploads that can run at once
+UPLOAD_WORKERS = max(1, (os.cpu_count() or 1) // MAX_CONCURRENT_JOBS)
+
+# Set POSE_PROFILE=1 to add a per-stage timing and memory profile to every upload's analysis summary
+PROFILE_UPLOADS = os.environ.get('POSE_PROFILE') == '1'
+
+# Videos are published into Streamlit's static folder (server.enableStaticServing in .streamlit/config.toml)
+# and streamed from disk with byte-range requests, instead of being read into memory for st.video
+STATIC_MEDIA_DIR = Path(__file__).parent / 'static' / 'media'
+STATIC_MEDIA_URL = '/app/static/media'
+# Largest file Streamlit's static endpoint serves, bigger videos go through st.video's media manager
+MAX_STATIC_MEDIA_BYTES = 200 * 1024 * 1024
+# Published upload results are removed after this many seconds
+RESULT_MEDIA_MAX_AGE = 2 * 60 * 60
+
+# Seconds between progress updates while an upload is being analysed in the background
+JOB_POLL_SECONDS = 1.0
+
+# Live tracking source: a camera index on the server, or a video file path that stands in for the camera
+LIVE_SOURCE = os.environ.get('LIVE_SOURCE', '0')
+LIVE_SOURCE = int(LIVE_SOURCE) if LIVE_SOURCE.isdigit() else LIVE_SOURCE
 
 
 # Set page config
@@ -69,6 +87,13 @@ st.set_page_config(
 if 'current_page' not in st.session_state: 
     st.session_state.current_page = 'home'
 
+@st.cache_resource
+def warm_pose_pool():
+    """Build and warm up a shared Pose graph once per server process, so no session pays for it on its first frame"""
+    pose_pool = load('pose_pool', 'POSE_POOL')
+    pose_pool.warm(load('pose_pool', 'POSE_SETTINGS'))
+    return pose_pool
+
 def set_background():
     st.markdown(
         """
@@ -304,211 +329,293 @@ def exercise_selection_page():
     
     st.title("Choose Your Exercise 💪")
     
-    # Define image URLs
-    images = {
-        'pushup': "https://raw.githubusercontent.com/Aman-Kaushik-20/A_GYM_ASSISTANT/main/Pushup_04.jpeg",
-        'deadlift': "https://raw.githubusercontent.com/Aman-Kaushik-20/A_GYM_ASSISTANT/main/deadlift_02.jpeg",
-        'bicep': "https://raw.githubusercontent.com/Aman-Kaushik-20/A_GYM_ASSISTANT/main/bicep_04.jpeg"
-    }
-    
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        st.markdown('<div class="exercise-card">', unsafe_allow_html=True)
-        st.image(images['pushup'], use_container_width=True)
-        st.markdown('<div class="button-container">', unsafe_allow_html=True)
-        if st.button("Push-ups", key="pushup_btn_selection"):  # Updated key
-            st.session_state.current_page = 'pushup_page'
-            st.session_state.selected_exercise = 'pushup'
-        st.markdown('</div></div>', unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown('<div class="exercise-card">', unsafe_allow_html=True)
-        st.image(images['deadlift'], use_container_width=True)
-        st.markdown('<div class="button-container">', unsafe_allow_html=True)
-        if st.button("Deadlifts", key="deadlift_btn_selection"):  # Updated key
-            st.session_state.current_page = 'deadlift_page'
-            st.session_state.selected_exercise = 'deadlift'
-        st.markdown('</div></div>', unsafe_allow_html=True)
-    
-    with col3:
-        st.markdown('<div class="exercise-card">', unsafe_allow_html=True)
-        st.image(images['bicep'], use_container_width=True)
-        st.markdown('<div class="button-container">', unsafe_allow_html=True)
-        if st.button("Bicep Curls", key="bicep_btn_selection"):  # Updated key
-            st.session_state.current_page = 'bicep_page'
-            st.session_state.selected_exercise = 'bicep'
-        st.markdown('</div></div>', unsafe_allow_html=True)
+    specs = exercise_specs()
+    for col, (name, spec) in zip(st.columns(len(specs)), specs.items()):
+        with col:
+            st.markdown('<div class="exercise-card">', unsafe_allow_html=True)
+            st.image(spec['image'], use_container_width=True)
+            st.markdown('<div class="button-container">', unsafe_allow_html=True)
+            if st.button(spec['title'], key=f"{name}_btn_selection"):
+                st.session_state.current_page = f"{name}_page"
+                st.session_state.selected_exercise = name
+            st.markdown('</div></div>', unsafe_allow_html=True)
 
 def handle_live_tracking(exercise_name):
     """
-    Handle live video processing for the selected exercise.
+    Run live tracking for the selected exercise and show the annotated frames in the page.
+    Runs until the source ends or the Stop button reruns the script, which closes the frame generator
+    and with it the camera.
     
     Args:
         exercise_name (str): Name of the exercise ('pushup', 'deadlift', or 'bicep')
     """
-    # Import the appropriate live tracking module based on exercise
+    exercise_frames = live_frames(exercise_name)
+    if exercise_frames is None:
+        st.error("Invalid exercise selected!")
+        return
+    
+    # Placeholders updated in place for every frame
+    video_placeholder = st.empty()
+    status_text = st.empty()
+    status_text.text("Initializing camera...")
+    
+    encoder = load('live_stream', 'AdaptiveJpegEncoder')()
+    frames = exercise_frames(LIVE_SOURCE)
     try:
-        if exercise_name == 'pushup':
-            tracking_function = pushup_live_track
-        elif exercise_name == 'deadlift':
-            tracking_function = deadlift_live_track
-        elif exercise_name == 'bicep':
-            tracking_function = bicep_live_track
-        else:
-            st.error("Invalid exercise selected!")
-            return
-        
-        # Create a placeholder for the video feed
-        video_placeholder = st.empty()
-        
-        # Create status indicators
-        status_text = st.empty()
-        progress_bar = st.progress(0)
-        
-        # Display initial status
-        status_text.text("Initializing camera...")
-        
-        try:
-            # Check if camera is available
-            cap = cv2.VideoCapture(0)
-            if not cap.isOpened():
-                st.error("Error: Could not access the webcam. Please make sure it's connected and not being used by another application.")
-                cap.release()
-                return
-            cap.release()
-            
-            # Update status
-            status_text.text(f"Starting {exercise_name} tracking. Press 'q' in the video window to stop.")
-            
-            # Start the live tracking
-            tracking_function()
-            
-            # Clear status indicators after tracking ends
-            status_text.empty()
-            progress_bar.empty()
-            
-        except Exception as e:
-            st.error(f"Error during live tracking: {str(e)}")
-            if 'cap' in locals():
-                cap.release()
-            cv2.destroyAllWindows()
-            
-    except ImportError as e:
-        st.error(f"Could not load the {exercise_name} tracking module: {str(e)}")
-    except Exception as e:
-        st.error(f"An unexpected error occurred: {str(e)}")
+        for image, state in frames:
+            jpeg = encoder.encode(image)
+            if jpeg is None:
+                continue
+            video_placeholder.image(jpeg, use_container_width=True)
+            status_text.text(f"Reps: {state['counter']} | Stage: {state['stage'] or '-'} | "
+                             f"Latency: {state['latency_ms']:.0f} ms | Stream quality: {encoder.quality}")
+        status_text.text("Live tracking ended.")
+    except ValueError as e:
+        st.error(f"Could not access the camera: {str(e)}")
+    except load('pose_pool', 'PoseEngineBusy') as e:
+        st.error(str(e))
     finally:
-        # Ensure we always clean up
-        cv2.destroyAllWindows()
+        frames.close()
 
+def show_live_tracking_tab(exercise_name):
+    """Start and stop buttons for live tracking, with the live view below them"""
+    st.markdown('<div class="live-tracking-container">', unsafe_allow_html=True)
+    st.warning("⚠️ This feature requires a camera connected to the server.")
+    
+    start_col, stop_col = st.columns(2)
+    with start_col:
+        if st.button("Start Live Tracking", key=f"live_{exercise_name}"):
+            st.session_state.tracking_active = True
+    with stop_col:
+        if st.button("Stop", key=f"stop_live_{exercise_name}"):
+            st.session_state.tracking_active = False
+    
+    if st.session_state.tracking_active:
+        handle_live_tracking(exercise_name)
+        st.session_state.tracking_active = False
+    
+    st.markdown('</div>', unsafe_allow_html=True)
 
-def convert_video_to_h264(input_path, output_path):
-    command = [
-        "ffmpeg",
-        "-i", input_path,
-        "-vcodec", "libx264",
-        "-acodec", "aac",
-        output_path
-    ]
+
+@st.cache_resource
+def get_job_queue():
+    """Process-wide queue of upload analysis jobs, shared by all sessions and kept across reruns"""
+    return JobQueue()
+
+def run_upload_job(job, exercise_name, input_path, content_hash, profiler):
+    """
+    Background part of an upload: make the original playable in the browser, then analyse the video as every
+    registered exercise from one pose pass, rendering the overlay of the page's exercise.
+    Returns dict with the original video path, the input and its content hash for later renders, the
+    analyse_all result, the rendered overlay 'videos' by exercise and the profile report
+    """
     try:
-        subprocess.run(command, check=True)
-        return True
-    except subprocess.CalledProcessError:
-        return False
-
-def get_processor(exercise_name):
-    processors = {
-        'pushup': uploaded_pushup_track,
-        'deadlift': uploaded_deadlift_track,
-        'bicep': uploaded_bicep_track
+        # Serve the original as-is, remux it or transcode it, whichever is enough for the browser.
+        # This runs first so its time is part of the profile stored in the analysis summary
+        job.progress('converting')
+        temp_original_h264 = tempfile.mktemp(suffix='_original_h264.mp4')
+        job.files.append(temp_original_h264)
+        with timed(profiler, 'browser_conversion'):
+            original_path, _ = load('video_io', 'prepare_for_browser')(input_path, temp_original_h264)
+        
+        # The overlay is already encoded as H.264
+        analysis = load('multi_exercise', 'analyse_all')(input_path, render=exercise_name, content_hash=content_hash, workers=UPLOAD_WORKERS,
+                               profiler=profiler, progress=job.progress)
+        job.files.append(analysis['video_path'])
+        for result in analysis['results'].values():
+            job.files.extend([result['summary_path'], result['record_path']])
+        
+        return {
+            'original_path': original_path,
+            'input_path': input_path,
+            'content_hash': content_hash,
+            'analysis': analysis,
+            'videos': {analysis['rendered']: analysis['video_path']},
+            'profile': profiler.finish() if profiler is not None else None
+        }
+    finally:
+        # Stop memory tracing even when processing failed
+        if profiler is not None:
+            profiler.finish()
+
+def run_render_job(job, exercise_name, input_path, content_hash):
+    """
+    Render the overlay of another exercise for an analysed upload. The landmarks of the upload's pose pass
+    are in the cache, so only the render pass runs. Returns the processed video path
+    """
+    process_upload = load('video_engine', 'process_upload')
+    processed_path, summary_path, record_path = process_upload(registered_exercises()[exercise_name], input_path,
+                                                               content_hash=content_hash, workers=UPLOAD_WORKERS,
+                                                               progress=job.progress)
+    job.files.extend([processed_path, summary_path, record_path])
+    return processed_path
+
+def format_job_progress(job):
+    """One-line description of a job's progress for the status display"""
+    if job.status == 'queued':
+        return "Waiting for a free worker..."
+    if job.cancel_requested:
+        return "Cancelling..."
+    labels = {
+        'converting': "Preparing the original video",
+        'processing': "Analysing and rendering",
+        'landmarks': "Detecting poses",
+        'rendering': "Rendering the results"
     }
-    return processors.get(exercise_name)
+    text = labels.get(job.stage, "Processing video")
+    if job.frame_count:
+        text += f": frame {job.frames_done} of {job.frame_count}"
+    eta = job.eta()
+    if eta is not None:
+        text += f", about {int(eta) + 1}s left"
+    return text
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def show_job_progress(job_id):
+    """Poll a running job, rerunning the whole page once it has finished so the results are shown"""
+    job = get_job_queue().get(job_id)
+    if job is None or job.finished:
+        st.rerun()
+    st.progress(job.fraction or 0.0, text=format_job_progress(job))
+
+def discard_upload_job(exercise_name):
+    """Cancel and forget this session's upload job for an exercise, removing its files"""
+    current = st.session_state.pop(f"upload_job_{exercise_name}", None)
+    if current is not None:
+        # Render jobs read the upload's input file, so they go first
+        for render_job_id in current['render_jobs'].values():
+            get_job_queue().discard(render_job_id)
+        get_job_queue().discard(current['job_id'])
+
+def show_processed_video(job, current, view):
+    """
+    Show the overlay video of the viewed exercise, rendering it in a background job the first time
+    an exercise other than the analysed one is viewed
+    """
+    result = job.result
+    if view in result['videos']:
+        show_video(result['videos'][view], f"result_{job.id}_{view}.mp4")
+        return
+
+    job_queue = get_job_queue()
+    render_job_id = current['render_jobs'].get(view)
+    render_job = job_queue.get(render_job_id) if render_job_id else None
+    if render_job is None:
+        render_job_id = job_queue.submit(f"{view} render", run_render_job, view, result['input_path'],
+                                         result['content_hash'])
+        current['render_jobs'][view] = render_job_id
+        render_job = job_queue.get(render_job_id)
+
+    if not render_job.finished:
+        show_job_progress(render_job.id)
+    elif render_job.status == 'done':
+        show_video(render_job.result, f"result_{job.id}_{view}.mp4")
+    else:
+        st.error(f"Error rendering the {registered_exercises()[view]['title']} overlay: {render_job.error}")
+        if st.button("Render again", key=f"rerender_{job.id}_{view}"):
+            job_queue.discard(current['render_jobs'].pop(view))
+            st.rerun()
 
+def show_upload_results(job, exercise_name, current):
+    """
+    Show the original and processed videos and the analysis report of a finished job.
+    The upload was analysed as every exercise, so switching the viewed exercise shows its reps and report
+    straight away and only renders its overlay video
+    """
+    result = job.result
+    analysis = result['analysis']
+    results = analysis['results']
+    detected = analysis['detected']
+    exercises = registered_exercises()
+
+    if detected is None:
+        st.info("The exercise in this video could not be recognised, showing it analysed as "
+                f"{exercises[exercise_name]['title']}.")
+    elif detected != exercise_name:
+        st.info(f"This looks like {exercises[detected]['title']} rather than {exercises[exercise_name]['title']}. "
+                "Pick it below to see its results.")
+
+    names = list(results)
+    view = st.radio("View results as", names, index=names.index(exercise_name), horizontal=True,
+                    format_func=lambda name: f"{exercises[name]['title']} ({results[name]['reps']} reps)"
+                                             + (" - detected" if name == detected else ""),
+                    key=f"view_{job.id}")
+    
+    # Create two columns for side-by-side display
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("### Original Video")
+        show_video(result['original_path'], f"result_{job.id}_original.mp4")
+    
+    with col2:
+        st.markdown("### Processed Results")
+        show_processed_video(job, current, view)
+    
+    # Display the report in expandable section below both videos, rendered from the per-frame record
+    summary_path = results[view]['summary_path']
+    if summary_path and os.path.exists(summary_path):
+        with st.expander("Show Analysis Details"):
+            st.text(render_report(*load_record(summary_path)))
+            if result['profile'] is not None:
+                st.json(result['profile'])
 
 def handle_video_upload(exercise_name, uploaded_file):
     if uploaded_file is not None:
-        processors = {
-            'pushup': pushup_process_video,
-            'deadlift': deadlift_process_video,
-            'bicep': bicep_process_video
-        }
-        processor = processors.get(exercise_name)
-        
-        if processor:
-            temp_files = []
-            try:
-                # Create temporary files
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as temp_input:
-                    temp_input.write(uploaded_file.read())
-                    temp_input_path = temp_input.name
-                    temp_files.append(temp_input_path)
-                
-                # Create temp files for both original and processed videos
-                temp_original_h264 = tempfile.mktemp(suffix='_original_h264.mp4')
-                temp_files.append(temp_original_h264)
-                
-                # Show processing status
-                status_placeholder = st.empty()
-                status_placeholder.info("Processing video... Please wait.")
-                
-                # Process the video first
-                processed_path, log_path = processor(temp_input_path)
-                temp_files.extend([processed_path, log_path])
-                
-                # Convert processed video
-                temp_processed_h264 = tempfile.mktemp(suffix='_processed_h264.mp4')
-                temp_files.append(temp_processed_h264)
-                
-                # Convert both videos to h264
-                original_success = convert_video_to_h264(temp_input_path, temp_original_h264)
-                processed_success = convert_video_to_h264(processed_path, temp_processed_h264)
-                
-                if original_success and processed_success:
-                    # Clear the processing status
-                    status_placeholder.empty()
-                    
-                    # Create two columns for side-by-side display
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.markdown("### Original Video")
-                        with open(temp_original_h264, 'rb') as video_file:
-                            video_bytes = video_file.read()
-                        st.video(video_bytes, muted=True, autoplay=True)
-                    
-                    with col2:
-                        st.markdown("### Processed Results")
-                        with open(temp_processed_h264, 'rb') as video_file:
-                            video_bytes = video_file.read()
-                        st.video(video_bytes, muted=True, autoplay=True)
+        if exercise_name in registered_exercises():
+            job_queue = get_job_queue()
+            job_key = f"upload_job_{exercise_name}"
+            current = st.session_state.get(job_key)
+            
+            # A new file replaces the previous job, a rerun with the same file picks its job up again
+            if current is None or current['file_id'] != uploaded_file.file_id:
+                discard_upload_job(exercise_name)
+                profiler = JobProfiler(f"{exercise_name} upload") if PROFILE_UPLOADS else None
+                UploadRejected = load('uploads', 'UploadRejected')
+                temp_input_path = None
+                try:
+                    # Copy the upload to disk in chunks, hashing it for the landmark cache on the way
+                    with timed(profiler, 'upload_spool'):
+                        suffix = Path(uploaded_file.name).suffix or '.mp4'
+                        temp_input_path, content_hash = load('uploads', 'spool_upload')(uploaded_file, suffix)
                     
-                    # Display log in expandable section below both videos
-                    if log_path and os.path.exists(log_path):
-                        with st.expander("Show Analysis Details"):
-                            with open(log_path, 'r') as log:
-                                st.text(log.read())
-                else:
-                    st.error("Error converting video formats")
+                    # Reject over-long videos before any processing starts
+                    with timed(profiler, 'upload_checks'):
+                        load('uploads', 'check_duration')(temp_input_path)
+                except UploadRejected as e:
+                    if temp_input_path:
+                        os.unlink(temp_input_path)
+                    if profiler is not None:
+                        profiler.finish()
+                    st.error(str(e))
+                    return
                 
-            except Exception as e:
-                st.error(f"Error processing video: {str(e)}")
-                raise e  # For debugging
+                job_id = job_queue.submit(f"{exercise_name} upload", run_upload_job, exercise_name, temp_input_path,
+                                          content_hash, profiler, files=[temp_input_path])
+                current = st.session_state[job_key] = {'job_id': job_id, 'file_id': uploaded_file.file_id,
+                                                       'render_jobs': {}}
             
-            finally:
-                # Clean up all temporary files
-                for file_path in temp_files:
-                    try:
-                        if file_path and os.path.exists(file_path):
-                            os.unlink(file_path)
-                    except PermissionError:
-                        try:
-                            import ctypes
-                            kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
-                            kernel32.MoveFileExW.argtypes = [ctypes.c_wchar_p, ctypes.c_wchar_p, ctypes.c_uint32]
-                            kernel32.MoveFileExW(file_path, None, 4)
-                        except:
-                            pass
+            job = job_queue.get(current['job_id'])
+            if job is None:
+                st.warning("These results have expired. Upload the video again to analyse it.")
+                st.session_state.pop(job_key, None)
+            elif not job.finished:
+                show_job_progress(job.id)
+                if st.button("Cancel analysis", key=f"cancel_{exercise_name}"):
+                    job.cancel()
+                    st.rerun()
+            elif job.status == 'done' and job.result['original_path']:
+                show_upload_results(job, exercise_name, current)
+            elif job.status == 'done':
+                st.error("Error converting video formats")
+            else:
+                if job.status == 'cancelled':
+                    st.info("Analysis cancelled.")
+                else:
+                    st.error(f"Error processing video: {str(job.error)}")
+                if st.button("Analyse again", key=f"retry_{exercise_name}"):
+                    discard_upload_job(exercise_name)
+                    st.rerun()
         else:
             st.error("Exercise processor not found!")
 
@@ -527,6 +634,67 @@ def add_video_css():
         </style>
     """, unsafe_allow_html=True)
 
+def _link_or_copy(source, target):
+    """Hard-link source to target, copying it across file systems, and swap it in atomically"""
+    temp_target = target.with_name(f".{uuid.uuid4().hex}{target.suffix}")
+    try:
+        os.link(source, temp_target)
+    except OSError:
+        shutil.copyfile(source, temp_target)
+    os.replace(temp_target, target)
+
+def sweep_result_media(max_age=RESULT_MEDIA_MAX_AGE):
+    """Remove published upload results older than max_age seconds"""
+    cutoff = time.time() - max_age
+    for path in STATIC_MEDIA_DIR.glob('result_*'):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+        except OSError:
+            pass
+
+def sweep_demo_media(cache_dir):
+    """Remove published demo versions the demo store has deleted, once no session holds them any more"""
+    for path in STATIC_MEDIA_DIR.glob('*_demo_h264.*'):
+        if not (cache_dir / path.name).exists():
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+def publish_video(video_path, name=None):
+    """
+    Publish a video file under the static folder and return its URL.
+    Named files keep their name and are only relinked when the source changed, unnamed files get a unique
+    name. Upload results (unnamed or named result_*) expire after RESULT_MEDIA_MAX_AGE, so publishing one
+    also sweeps the expired ones. Returns None when static serving is off or the file is too big for it
+    """
+    if not st.get_option('server.enableStaticServing'):
+        return None
+    if os.path.getsize(video_path) > MAX_STATIC_MEDIA_BYTES:
+        return None
+
+    STATIC_MEDIA_DIR.mkdir(parents=True, exist_ok=True)
+    if name is None:
+        name = f"result_{uuid.uuid4().hex}{Path(video_path).suffix}"
+    if name.startswith('result_'):
+        sweep_result_media()
+
+    target = STATIC_MEDIA_DIR / name
+    try:
+        published = os.path.samefile(video_path, target) or (
+            os.path.getsize(target) == os.path.getsize(video_path)
+            and os.path.getmtime(target) >= os.path.getmtime(video_path))
+    except OSError:
+        published = False
+    if not published:
+        _link_or_copy(video_path, target)
+    return f"{STATIC_MEDIA_URL}/{name}"
+
+def show_video(video_path, name=None):
+    """Play a video from disk, through the static endpoint when possible so the browser can stream and seek it"""
+    st.video(publish_video(video_path, name) or video_path, muted=True, autoplay=True)
+
 def get_demo_video_path(exercise_name):
     """
     Get the absolute path to the demo video file, checking multiple possible locations.
@@ -553,231 +721,72 @@ def get_demo_video_path(exercise_name):
     return None
 
 
-
-import requests
-import tempfile
-import os
-import re
-
-def get_drive_file_id(url):
-    """Extract file ID from Google Drive URL"""
-    file_id = None
-    patterns = [
-        r'https://drive\.google\.com/file/d/(.*?)/',  # Regular share URL
-        r'https://drive\.google\.com/open\?id=(.*?)(?:&|$)',  # Open URL
-        r'https://drive\.google\.com/uc\?.*?id=(.*?)(?:&|$)',  # Direct download URL
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, url)
-        if match:
-            file_id = match.group(1)
-            break
-    
-    return file_id
-
-def download_from_drive(url):
-    """
-    Download a file from Google Drive handling large files and redirects
-    """
-    file_id = get_drive_file_id(url)
-    if not file_id:
-        raise ValueError("Could not extract Google Drive file ID from URL")
-
-    # Create a session to handle cookies
-    session = requests.Session()
-    
-    try:
-        # First, try to get the direct download URL
-        download_url = f"https://drive.google.com/uc?id={file_id}&export=download"
-        response = session.get(download_url, stream=True)
-        
-        # Check if there's a download warning (large file)
-        for key, value in response.cookies.items():
-            if key.startswith('download_warning'):
-                download_url = f"{download_url}&confirm={value}"
-                response = session.get(download_url, stream=True)
-                break
-        
-        # Create temporary file
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.mp4')
-        temp_path = temp_file.name
-        
-        # Download the file in chunks
-        with open(temp_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=32768):
-                if chunk:
-                    f.write(chunk)
-        
-        return temp_path
-        
-    except Exception as e:
-        if os.path.exists(temp_path):
-            os.unlink(temp_path)
-        raise e
-    
-
-
-import streamlit as st
-import tempfile
-import os
-import requests
-import subprocess
-from pathlib import Path
-
-
-from concurrent.futures import ThreadPoolExecutor, as_completed
-
-# Define video URLs at module level
-VIDEO_URLS = {
-    'pushup': 'https://drive.google.com/file/d/1zN0eRLrj_urOaMxgFujO5UYrzxpsZqnT/view?usp=sharing',
-    'deadlift': 'https://drive.google.com/file/d/1o9xksuVOEAmiTjAaQ-K69PdJNOE8ZN1R/view?usp=sharing',
-    'bicep': 'https://drive.google.com/file/d/1HXuRYvn0bIsuXw3a-_RPEGWe9XZn97mf/view?usp=sharing'
-}
+@st.cache_resource
+def get_demo_store():
+    """Process-wide store of the demo videos, built once per server process and fetched in the background"""
+    return load('demo_assets', 'DemoAssetStore')().start()
 
 def preload_videos():
-    """
-    Preload all videos into cache at app startup
-    """
-    if 'videos_preloaded' not in st.session_state:
-        st.session_state.videos_preloaded = False
-        
-    if not st.session_state.videos_preloaded:
-        cache_dir = Path(tempfile.gettempdir()) / 'streamlit_video_cache'
-        cache_dir.mkdir(exist_ok=True)
-        
-        if 'video_cache' not in st.session_state:
-            st.session_state.video_cache = {}
-        
-        # Create a progress container
-        progress_container = st.empty()
-        with progress_container.container():
-            st.write("Initializing exercise videos...")
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            total_videos = len(VIDEO_URLS)
-            for idx, (exercise_name, url) in enumerate(VIDEO_URLS.items()):
-                try:
-                    cached_file = cache_dir / f"{exercise_name}_demo_h264.mp4"
-                    
-                    if not cached_file.exists():
-                        status_text.text(f"Downloading {exercise_name} video...")
-                        downloaded_path = download_from_drive(url)
-                        
-                        status_text.text(f"Converting {exercise_name} video...")
-                        command = [
-                            "ffmpeg",
-                            "-i", downloaded_path,
-                            "-vcodec", "libx264",
-                            "-acodec", "aac",
-                            "-y",
-                            str(cached_file)
-                        ]
-                        subprocess.run(command, check=True, capture_output=True)
-                        
-                        # Clean up downloaded file
-                        os.unlink(downloaded_path)
-                    
-                    st.session_state.video_cache[exercise_name] = str(cached_file)
-                    
-                except Exception as e:
-                    st.error(f"Error processing {exercise_name} video: {str(e)}")
-                
-                # Update progress
-                progress_bar.progress((idx + 1) / total_videos)
-                
-            # Clean up progress indicators
-            progress_container.empty()
-            
-        st.session_state.videos_preloaded = True
+    """Start fetching the demo videos once per server process, so no session waits for or repeats it"""
+    get_demo_store()
 
 def get_cached_video(exercise_name):
     """
-    Get video from cache
+    Get the demo video of an exercise from the shared store, holding a reference for this session.
+    Returns tuple of (path, error) where both are None while the demo is still being fetched
     """
-    if exercise_name in st.session_state.video_cache:
-        cached_path = st.session_state.video_cache[exercise_name]
-        if os.path.exists(cached_path):
-            return cached_path
-    return None
+    if 'demo_lease' not in st.session_state:
+        st.session_state.demo_lease = load('demo_assets', 'DemoLease')(get_demo_store())
+    return st.session_state.demo_lease.get(exercise_name)
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def wait_for_demo(exercise_name):
+    """Poll a demo that is still being fetched, rerunning the page once it is ready"""
+    if not get_demo_store().pending(exercise_name):
+        st.rerun()
+    st.info(f"Downloading the {exercise_name} demo video...")
 
 def display_cached_video(exercise_name):
     """
     Display video from cache
     """
-    video_path = get_cached_video(exercise_name)
-    
-    if video_path and os.path.exists(video_path):
-        with open(video_path, 'rb') as video_file:
-            video_bytes = video_file.read()
-        st.video(video_bytes, muted=True, autoplay=True)
+    video_path, error = get_cached_video(exercise_name)
+
+    if video_path:
+        # The store's file names carry the content digest, so every version gets a URL of its own
+        sweep_demo_media(get_demo_store().cache_dir)
+        show_video(video_path, Path(video_path).name)
+    elif error is None:
+        wait_for_demo(exercise_name)
     else:
-        st.error(f"Failed to load {exercise_name} video")
+        st.error(f"Failed to load {exercise_name} video: {error}")
 
 def clear_video_cache():
     """
-    Clear the video cache
-    """
-    if 'video_cache' in st.session_state:
-        for cached_path in st.session_state.video_cache.values():
-            if os.path.exists(cached_path):
-                os.unlink(cached_path)
-        st.session_state.video_cache = {}
-    st.session_state.videos_preloaded = False
-
-# Keep the existing download_from_drive function
-def download_from_drive(url):
+    Fetch the demo videos again. Files other sessions still show are only deleted once they let go of them
     """
-    Download a file from Google Drive and return the path to the downloaded file
+    lease = st.session_state.pop('demo_lease', None)
+    if lease is not None:
+        lease.release()
+    get_demo_store().refresh()
+
+
+def instructions_html(instructions):
+    """Instructions block of an exercise page from the 'instructions' of its spec"""
+    steps = ''.join(f"<li>{step}</li>" for step in instructions['steps'])
+    return f"""
+    <div class="exercise-instructions">
+        <h2 class="instructions-title">{instructions['heading']}</h2>
+        <div class="camera-note">NOTE: {instructions['camera_note']}</div>
+        <ol>{steps}</ol>
+    </div>
     """
-    file_id = url.split('/')[5]  # Extract file ID from the URL
-    download_url = f"https://drive.google.com/uc?id={file_id}"
-    
-    # Create a temporary file
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.mp4')
-    temp_path = temp_file.name
-    
-    # Download the file
-    response = requests.get(download_url, stream=True)
-    with open(temp_path, 'wb') as f:
-        for chunk in response.iter_content(chunk_size=32768):
-            if chunk:
-                f.write(chunk)
-    
-    return temp_path
 
-def convert_to_h264(input_path):
-    """Convert video to H264 format"""
-    temp_output = tempfile.NamedTemporaryFile(delete=False, suffix='_h264.mp4')
-    temp_output_path = temp_output.name
-    temp_output.close()
-    
-    try:
-        command = [
-            "ffmpeg",
-            "-i", input_path,
-            "-vcodec", "libx264",
-            "-acodec", "aac",
-            "-y",
-            temp_output_path
-        ]
-        
-        result = subprocess.run(command, capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            return temp_output_path
-        else:
-            st.error(f"Conversion error: {result.stderr}")
-            os.unlink(temp_output_path)
-            return None
-            
-    except Exception as e:
-        st.error(f"Error during conversion: {str(e)}")
-        if os.path.exists(temp_output_path):
-            os.unlink(temp_output_path)
-        return None
 
+def exercise_of_page(page):
+    """Name of the exercise a '<name>_page' page shows, None for other pages"""
+    name = page[:-len('_page')] if page.endswith('_page') else None
+    return name if name in exercise_specs() else None
 
 
 def exercise_page(exercise_name):
@@ -786,57 +795,7 @@ def exercise_page(exercise_name):
     left_col, right_col = st.columns([1, 1])
     
     with left_col:
-        instructions = {
-            'pushup': """
-            <div class="exercise-instructions">
-                <h2 class="instructions-title">Push-up Instructions:</h2>
-                <div class="camera-note">
-                    NOTE: Position yourself so your left side faces the camera. 
-                    Ensure your full body is visible and only one person is in frame.
-                </div>
-                <ol>
-                    <li>Start in a plank position with hands shoulder-width apart</li>
-                    <li>Keep your core tight and back straight</li>
-                    <li>Lower your body until chest nearly touches the ground</li>
-                    <li>Push back up to starting position</li>
-                    <li>Maintain proper form throughout the movement</li>
-                </ol>
-            </div>
-            """,
-            'deadlift': """
-            <div class="exercise-instructions">
-                <h2 class="instructions-title">Deadlift Instructions:</h2>
-                <div class="camera-note">
-                    NOTE: Position yourself so your left side faces the camera. 
-                    Ensure your full body is visible and only one person is in frame.
-                </div>
-                <ol>
-                    <li>Stand with feet hip-width apart</li>
-                    <li>Bend at hips and knees to grasp the bar</li>
-                    <li>Keep back straight and chest up</li>
-                    <li>Push through heels to lift the bar</li>
-                    <li>Return to starting position with controlled movement</li>
-                </ol>
-            </div>
-            """,
-            'bicep': """
-            <div class="exercise-instructions">
-                <h2 class="instructions-title">Bicep Curl Instructions:</h2>
-                <div class="camera-note">
-                    NOTE: Position yourself so your left arm is visible to  the camera. 
-                    Ensure your full body is visible and only one person is in frame.
-                </div>
-                <ol>
-                    <li>Stand with feet shoulder-width apart</li>
-                    <li>Hold dumbbells at your sides</li>
-                    <li>Keep elbows close to your body</li>
-                    <li>Curl weights up towards shoulders</li>
-                    <li>Lower weights back down with control</li>
-                </ol>
-            </div>
-            """
-        }
-        st.markdown(instructions[exercise_name], unsafe_allow_html=True)
+        st.markdown(instructions_html(exercise_specs()[exercise_name]['instructions']), unsafe_allow_html=True)
 
     with right_col:
         st.markdown('<div class="section-container">', unsafe_allow_html=True)
@@ -845,11 +804,10 @@ def exercise_page(exercise_name):
         st.markdown('</div>', unsafe_allow_html=True)
 
         # Create tabs for upload and live tracking
-        # tab1, tab2 = st.tabs(["📤 Upload Video", "📹 Live Tracking"])
-        tab1 = st.tabs(["📤 Upload Video"])
+        tab1, tab2 = st.tabs(["📤 Upload Video", "📹 Live Tracking"])
 
 
-    with tab1[0]:
+    with tab1:
         st.markdown('<div class="upload-container">', unsafe_allow_html=True)
         add_video_css()  # Add the CSS for video styling
         
@@ -861,47 +819,24 @@ def exercise_page(exercise_name):
         
         if uploaded_file:
             handle_video_upload(exercise_name, uploaded_file)
+        else:
+            discard_upload_job(exercise_name)
             
         st.markdown('</div>', unsafe_allow_html=True)
 
-
-        # with tab2:
-        #     st.markdown('<div class="live-tracking-container">', unsafe_allow_html=True)
-            
-        #     # Add camera permission warning
-        #     st.warning("⚠️ This feature requires camera access. Please ensure your camera is connected and available.")
-            
-        #     # Add live tracking button with error handling
-        #     if st.button("Start Live Tracking", key=f"live_{exercise_name}"):
-        #         try:
-        #             # Check camera availability before starting
-        #             cap = cv2.VideoCapture(0)
-        #             if not cap.isOpened():
-        #                 st.error("Could not access webcam. Please check your camera connection and permissions.")
-        #                 cap.release()
-        #             else:
-        #                 cap.release()
-        #                 # Show tracking instructions
-        #                 st.info("Press 'q' in the video window to stop tracking")
-        #                 # Start live tracking
-        #                 handle_live_tracking(exercise_name)
-        #         except Exception as e:
-        #             st.error(f"An error occurred: {str(e)}")
-        #             if 'cap' in locals():
-        #                 cap.release()
-        #             cv2.destroyAllWindows()
-            
-            # # Add helpful tips for live tracking
-            # with st.expander("Tips for best tracking results"):
-            #     st.markdown("""
-            #     - Ensure good lighting in your workout area
-            #     - Position yourself so your left side faces the camera
-            #     - Keep your full body visible in the frame
-            #     - Wear contrasting clothes to your background
-            #     - Clear the area of other people or moving objects
-            #     """)
-            
-            # st.markdown('</div>', unsafe_allow_html=True)
+    with tab2:
+        # Add helpful tips for live tracking
+        with st.expander("Tips for best tracking results"):
+            st.markdown("""
+            - Ensure good lighting in your workout area
+            - Position yourself so your left side faces the camera
+            - Keep your full body visible in the frame
+            - Wear contrasting clothes to your background
+            - Clear the area of other people or moving objects
+            """)
+        
+        # The live view keeps this script run busy until it is stopped, so it comes last in the tab
+        show_live_tracking_tab(exercise_name)
 
     # Add back button at the bottom of the page
     if st.button("⬅️ Back to Exercise Selection", key=f"back_{exercise_name}"):
@@ -915,16 +850,12 @@ def main():
     if 'tracking_active' not in st.session_state:
         st.session_state.tracking_active = False
     
-    set_background()
-    preload_videos()
-    
     if st.session_state.current_page == 'home':
         home_page()
     elif st.session_state.current_page == 'exercise_selection':
         exercise_selection_page()
-    elif st.session_state.current_page in ['pushup_page', 'deadlift_page', 'bicep_page']:
-        exercise_name = st.session_state.current_page.split('_')[0]
-        exercise_page(exercise_name)
+    elif exercise_of_page(st.session_state.current_page) is not None:
+        exercise_page(exercise_of_page(st.session_state.current_page))
     
     if st.session_state.current_page != 'home':
         if st.button("Back to Home", key=f"home_btn_{st.session_state.current_page}"):
@@ -932,6 +863,13 @@ def main():
             # Reset tracking state when returning home
             st.session_state.tracking_active = False
 
+    # Heavier setup runs after the page has been sent to the browser: the background image, the demo videos
+    # fetched for every page, and the pose graph, which is only needed once an exercise page is open
+    set_background()
+    preload_videos()
+    if exercise_of_page(st.session_state.current_page) is not None:
+        warm_pose_pool()
+
 if __name__ == "__main__":
     main()
     
\ No newline at end of file
@@ -0,0 +1,352 @@
+"""
+Benchmarks for the exercise processors.
+
+Generates reproducible synthetic clips (or uses the clips given with --clip), then measures per-stage
+throughput, end-to-end upload processing, per-frame latency of the live loop and peak RSS.
+Results are written as JSON so runs can be compared:
+
+    python -m benchmarks.bench_processors --output before.json
+    python -m benchmarks.bench_processors --output after.json --compare before.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from exercises.landmarks import NUM_LANDMARKS, VISIBILITY, landmarks_to_array
+from exercises.rep_engine import EXERCISES
+from exercises.video_engine import POSE_SETTINGS, INFERENCE_MAX_SIDE, fit_size, mp_pose, process_upload
+from exercises.video_io import open_video_writer, prepare_for_browser
+
+# Resolutions and lengths of the generated clips
+RESOLUTIONS = {
+    '480p': (854, 480),
+    '720p': (1280, 720),
+    '1080p': (1920, 1080)
+}
+DEFAULT_RESOLUTIONS = ['480p', '720p']
+DEFAULT_SECONDS = [5, 20]
+CLIP_FPS = 30
+CLIP_SEED = 0
+
+CLIP_DIR = Path(tempfile.gettempdir()) / 'pose_benchmark_clips'
+
+# Frames held in memory for the per-stage benchmarks
+STAGE_FRAMES = 90
+
+def generate_clip(resolution, seconds, clip_dir=CLIP_DIR):
+    """
+    Render a reproducible synthetic clip: a stick figure curling one arm over a noisy background.
+    Clips are generated once per resolution and length and reused afterwards
+    """
+    width, height = RESOLUTIONS[resolution]
+    path = clip_dir / f"clip_{resolution}_{seconds}s_seed{CLIP_SEED}.mp4"
+    if path.exists():
+        return str(path)
+
+    clip_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(CLIP_SEED)
+    background = rng.integers(40, 90, size=(height, width, 3), dtype=np.uint8)
+
+    tmp_path = str(path.with_suffix('.tmp.mp4'))
+    out = open_video_writer(tmp_path, CLIP_FPS, (width, height))
+    unit = height / 10
+    cx = width // 2
+    for i in range(seconds * CLIP_FPS):
+        frame = background.copy()
+        curl = (1 - np.cos(2 * np.pi * i / (2 * CLIP_FPS))) / 2 * np.pi * 0.8
+
+        head = (cx, int(2 * unit))
+        shoulder = (cx, int(3 * unit))
+        hip = (cx, int(6 * unit))
+        elbow = (int(cx + unit), int(4.5 * unit))
+        wrist = (int(elbow[0] + unit * 1.2 * np.sin(curl)), int(elbow[1] + unit * 1.2 * np.cos(curl)))
+
+        cv2.circle(frame, head, int(unit * 0.6), (200, 180, 160), -1)
+        for a, b in [(shoulder, hip), (shoulder, elbow), (elbow, wrist),
+                     (hip, (int(cx - unit), int(9 * unit))), (hip, (int(cx + unit), int(9 * unit))),
+                     (shoulder, (int(cx - unit), int(4.5 * unit)))]:
+            cv2.line(frame, a, b, (200, 180, 160), max(2, int(unit * 0.3)))
+        out.write(frame)
+    out.release()
+
+    os.replace(tmp_path, path)
+    return str(path)
+
+
+def _stage_result(frames, seconds):
+    return {
+        'frames': frames,
+        'seconds': round(seconds, 4),
+        'fps': round(frames / seconds, 2) if seconds else None,
+        'ms_per_frame': round(seconds * 1000 / frames, 3) if frames else None
+    }
+
+
+def _percentiles(samples):
+    samples = np.asarray(samples) * 1000
+    return {f"p{p}": round(float(np.percentile(samples, p)), 3) for p in (50, 90, 95, 99)}
+
+
+def _synthetic_landmarks():
+    """A fixed plausible (33, 4) landmark array for the draw benchmarks"""
+    rng = np.random.default_rng(CLIP_SEED)
+    landmarks = rng.uniform(0.3, 0.7, size=(NUM_LANDMARKS, 4)).astype(np.float32)
+    landmarks[:, VISIBILITY] = 1.0
+    return landmarks
+
+
+def bench_stages(clip_path):
+    """Throughput of every processing stage on the frames of one clip"""
+    results = {}
+
+    cap = cv2.VideoCapture(clip_path)
+    width, height = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    frames = []
+    count = 0
+    start = time.perf_counter()
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        count += 1
+        if len(frames) < STAGE_FRAMES:
+            frames.append(frame)
+    results['decode'] = _stage_result(count, time.perf_counter() - start)
+    cap.release()
+
+    start = time.perf_counter()
+    for frame in frames:
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    results['color_conversion'] = _stage_result(len(frames), time.perf_counter() - start)
+
+    inference_size = fit_size(width, height, INFERENCE_MAX_SIDE)
+    start = time.perf_counter()
+    small = [cv2.resize(frame, inference_size, interpolation=cv2.INTER_AREA) if inference_size else frame
+             for frame in frames]
+    results['inference_resize'] = _stage_result(len(frames), time.perf_counter() - start)
+
+    for name, images in [('pose_full_resolution', frames), ('pose', small)]:
+        rgb = [cv2.cvtColor(image, cv2.COLOR_BGR2RGB) for image in images]
+        with mp_pose.Pose(**POSE_SETTINGS) as pose:
+            start = time.perf_counter()
+            for image in rgb:
+                pose.process(image)
+            results[name] = _stage_result(len(rgb), time.perf_counter() - start)
+
+    landmarks = _synthetic_landmarks()
+    for exercise, hooks in EXERCISES.items():
+        analysis = hooks['analyze_series'](landmarks[None])
+        frame_state = {key: values[0] for key, values in analysis['frames'].items()}
+        images = [frame.copy() for frame in frames]
+        start = time.perf_counter()
+        for image in images:
+            hooks['draw_frame'](image, landmarks, frame_state)
+        results[f'draw_{exercise}'] = _stage_result(len(images), time.perf_counter() - start)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out = open_video_writer(os.path.join(tmp, 'encode.mp4'), fps, (width, height))
+        start = time.perf_counter()
+        for frame in frames:
+            out.write(frame)
+        out.release()
+        results['encode'] = _stage_result(len(frames), time.perf_counter() - start)
+
+        start = time.perf_counter()
+        _, action = prepare_for_browser(clip_path, os.path.join(tmp, 'browser.mp4'))
+        results['ffmpeg_conversion'] = dict(_stage_result(count, time.perf_counter() - start), action=action)
+
+    return results
+
+
+def bench_live_latency(clip_path, exercise):
+    """
+    Per-frame latency of the live loop (color conversion, pose, drawing), fed from a clip instead
+    of the webcam so runs are reproducible
+    """
+    cap = cv2.VideoCapture(clip_path)
+    hooks = EXERCISES[exercise]
+    state = hooks['init_state']()
+    latencies = []
+    with mp_pose.Pose(**POSE_SETTINGS) as pose:
+        while len(latencies) < STAGE_FRAMES:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            start = time.perf_counter()
+            image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            image.flags.writeable = False
+            landmarks = landmarks_to_array(pose.process(image).pose_landmarks)
+            hooks['update_state'](state, landmarks, len(latencies) + 1)
+            hooks['draw_frame'](frame, landmarks, dict(state))
+            latencies.append(time.perf_counter() - start)
+    cap.release()
+
+    total = sum(latencies)
+    return dict(_stage_result(len(latencies), total), latency_ms=_percentiles(latencies) if latencies else {})
+
+
+def _peak_rss_mb():
+    """
+    Peak resident memory of this process. VmHWM is preferred on Linux because ru_maxrss carries
+    the parent's peak over into spawned processes
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20, 1)
+
+
+def _end_to_end(clip_path, exercise, options, results):
+    """Worker for bench_end_to_end, run in a fresh process so its peak RSS is its own"""
+    cap = cv2.VideoCapture(clip_path)
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+
+    start = time.perf_counter()
+    paths = process_upload(EXERCISES[exercise], clip_path, **options)
+    seconds = time.perf_counter() - start
+    for path in paths:
+        os.remove(path)
+
+    # Peak of the largest child process (ffmpeg or a segment worker)
+    scale = 1 if sys.platform == 'darwin' else 1024
+    results.update(_stage_result(frame_count, seconds))
+    results['latency_seconds'] = round(seconds, 4)
+    results['peak_rss_mb'] = _peak_rss_mb()
+    results['peak_child_rss_mb'] = round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale / 2**20, 1)
+
+
+def bench_end_to_end(clip_path, exercise, options):
+    """Time one process_video call end to end in a separate process and report its peak memory"""
+    context = multiprocessing.get_context('spawn')
+    with context.Manager() as manager:
+        results = manager.dict()
+        process = context.Process(target=_end_to_end, args=(clip_path, exercise, options, results))
+        process.start()
+        process.join()
+        if process.exitcode != 0:
+            return {'error': f"exit code {process.exitcode}"}
+        return dict(results)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(clips, exercises, workers):
+    """Run every benchmark over the clips and return the JSON-serializable results"""
+    report = {
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'opencv': cv2.__version__,
+        'cpu_count': os.cpu_count(),
+        'ffmpeg': shutil.which("ffmpeg") is not None,
+        'clips': {}
+    }
+
+    for name, clip_path in clips.items():
+        print(f"Benchmarking {name}...", file=sys.stderr)
+        clip = {'path': clip_path, 'stages': bench_stages(clip_path), 'live': {}, 'end_to_end': {}}
+
+        for exercise in exercises:
+            clip['live'][exercise] = bench_live_latency(clip_path, exercise)
+
+            # A fresh content hash per run forces a cache miss, repeating it measures the cached path
+            content_hash = uuid.uuid4().hex
+            modes = {
+                'streaming': {'content_hash': content_hash},
+                'cached': {'content_hash': content_hash},
+                'two_pass': {'two_pass': True, 'content_hash': uuid.uuid4().hex}
+            }
+            if workers > 1:
+                modes['parallel'] = {'workers': workers, 'content_hash': uuid.uuid4().hex}
+            clip['end_to_end'][exercise] = {mode: bench_end_to_end(clip_path, exercise, options)
+                                            for mode, options in modes.items()}
+
+        report['clips'][name] = clip
+
+    return report
+
+
+def _flatten(report):
+    """Map 'clip/section/.../metric' paths to the fps and latency numbers of a report"""
+    values = {}
+
+    def walk(prefix, node):
+        for key, value in node.items():
+            if isinstance(value, dict):
+                walk(f"{prefix}/{key}", value)
+            elif key in ('fps', 'latency_seconds', 'peak_rss_mb') and value is not None:
+                values[f"{prefix}/{key}"] = value
+
+    for name, clip in report['clips'].items():
+        walk(name, clip)
+    return values
+
+
+def compare(report, baseline):
+    """Print the change of every metric relative to a baseline report"""
+    current, previous = _flatten(report), _flatten(baseline)
+    for key in sorted(current.keys() & previous.keys()):
+        if previous[key]:
+            change = (current[key] - previous[key]) / previous[key] * 100
+            print(f"{key:70s} {previous[key]:>10} -> {current[key]:>10} ({change:+.1f}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clip', action='append', default=[], help="benchmark this video instead of generated clips")
+    parser.add_argument('--resolutions', nargs='+', default=DEFAULT_RESOLUTIONS, choices=sorted(RESOLUTIONS))
+    parser.add_argument('--seconds', nargs='+', type=int, default=DEFAULT_SECONDS)
+    parser.add_argument('--exercises', nargs='+', default=list(EXERCISES), choices=list(EXERCISES))
+    parser.add_argument('--workers', type=int, default=1, help="also benchmark segment-parallel processing")
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--compare', help="baseline JSON report to compare against")
+    args = parser.parse_args(argv)
+
+    if args.clip:
+        clips = {Path(path).stem: path for path in args.clip}
+    else:
+        clips = {f"{resolution}_{seconds}s": generate_clip(resolution, seconds)
+                 for resolution in args.resolutions for seconds in args.seconds}
+
+    report = run(clips, args.exercises, args.workers)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
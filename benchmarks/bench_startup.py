@@ -0,0 +1,147 @@
+"""
+Cold start benchmark for the app.
+
+Imports app.py in fresh interpreters under `python -X importtime` and reports the import time, the
+slowest imports and the peak RSS of an idle worker, then loads what an exercise page needs through
+the registry and reports the time each lazily imported module took. Results are written as JSON so
+runs can be compared:
+
+    python -m benchmarks.bench_startup --output before.json
+    python -m benchmarks.bench_startup --output after.json --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+# Modules that make a cold start slow, reported as loaded or not after importing the app
+HEAVY_MODULES = ['cv2', 'mediapipe', 'requests', 'PIL.Image']
+
+DEFAULT_RUNS = 5
+SLOWEST_IMPORTS = 15
+
+# Run in the child interpreter. 'page' also loads everything an exercise page uses
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+import app
+result = {{'import_seconds': time.perf_counter() - started}}
+if {page!r}:
+    from exercises import registry
+    started = time.perf_counter()
+    registry.registered_exercises()
+    for name in registry.exercise_specs():
+        registry.live_frames(name)
+    for module_name, attribute in [('multi_exercise', 'analyse_all'), ('video_engine', 'process_upload'),
+                                   ('uploads', 'spool_upload'), ('live_stream', 'AdaptiveJpegEncoder'),
+                                   ('demo_assets', 'DemoAssetStore'), ('pose_pool', 'POSE_POOL')]:
+        registry.load(module_name, attribute)
+    result['page_load_seconds'] = time.perf_counter() - started
+    result['lazy_imports'] = registry.IMPORT_TIMES
+result['heavy_modules'] = {{name: name in sys.modules for name in {heavy!r}}}
+with open('/proc/self/status') as f:
+    result['peak_rss_mb'] = next(round(int(line.split()[1]) / 1024, 1) for line in f if line.startswith('VmHWM:'))
+print(json.dumps(result))
+"""
+
+
+def _parse_importtime(stderr):
+    """
+    Cumulative microseconds of the top-level imports and the modules they import directly (the app's
+    own imports), from `-X importtime` output
+    """
+    imports = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nested imports are indented by two spaces per level below the module that triggered them
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth <= 1:
+            imports[name.strip()] = int(cumulative)
+    return imports
+
+
+def run_child(page):
+    """Import the app in a fresh interpreter. Returns tuple of (child result, import times of the app and its imports)"""
+    code = CHILD.format(page=page, heavy=HEAVY_MODULES)
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=REPO_DIR,
+                               capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1]), _parse_importtime(completed.stderr)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=REPO_DIR).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(runs):
+    """Measure the idle app and an opened exercise page over several fresh interpreters"""
+    report = {
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'cpu_count': os.cpu_count()
+    }
+
+    for mode, page in (('idle', False), ('exercise_page', True)):
+        print(f"Benchmarking {mode}...", file=sys.stderr)
+        samples = [run_child(page) for _ in range(runs)]
+        results = [result for result, _ in samples]
+        imports = samples[-1][1]
+        slowest = sorted(imports.items(), key=lambda item: item[1], reverse=True)[:SLOWEST_IMPORTS]
+        section = {
+            'import_seconds': round(statistics.median(result['import_seconds'] for result in results), 4),
+            'peak_rss_mb': statistics.median(result['peak_rss_mb'] for result in results),
+            'heavy_modules': results[-1]['heavy_modules'],
+            'slowest_imports_ms': {name: round(us / 1000, 2) for name, us in slowest}
+        }
+        if page:
+            section['page_load_seconds'] = round(statistics.median(result['page_load_seconds']
+                                                                   for result in results), 4)
+            section['lazy_imports'] = results[-1]['lazy_imports']
+        report[mode] = section
+
+    return report
+
+
+def compare(report, baseline):
+    """Print the change of the timing and memory numbers relative to a baseline report"""
+    for mode in ('idle', 'exercise_page'):
+        for key in ('import_seconds', 'page_load_seconds', 'peak_rss_mb'):
+            previous, current = baseline.get(mode, {}).get(key), report[mode].get(key)
+            if previous and current is not None:
+                change = (current - previous) / previous * 100
+                print(f"{mode}/{key:30s} {previous:>10} -> {current:>10} ({change:+.1f}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS, help="fresh interpreters per measurement")
+    parser.add_argument('--output', default='bench_startup.json')
+    parser.add_argument('--compare', help="baseline JSON report to compare against")
+    args = parser.parse_args(argv)
+
+    report = run(args.runs)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
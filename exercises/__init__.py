@@ -1,5 +1,11 @@
-from .uploaded_pushup_track import process_video as pushup_process_video
-from .uploaded_deadlift_track import process_video as deadlift_process_video
-from .uploaded_bicep_track import process_video as bicep_process_video
+from .registry import upload_processor
+from .specs import EXERCISE_SPECS
 
-__all__ = ['pushup_process_video', 'deadlift_process_video', 'bicep_process_video']
\ No newline at end of file
+__all__ = [f"{name}_process_video" for name in EXERCISE_SPECS]
+
+
+def __getattr__(name):
+    # The processors pull in cv2 and mediapipe, so they are built on first access
+    if name in __all__:
+        return upload_processor(name[:-len('_process_video')])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,202 @@
+import json
+from datetime import datetime
+
+import numpy as np
+
+from .profiling import format_report
+
+# Rows buffered in memory before a batch is appended to the record file
+RECORD_BATCH_FRAMES = 256
+
+# Columns every record has, followed by the exercise's angle columns (float32 degrees).
+# frame is 1-based as in the reports, stage indexes the summary's stage names,
+# visibility is the mean landmark visibility of the exercise's key joints (NaN without a pose)
+BASE_COLUMNS = [
+    ('frame', '<i4'),
+    ('timestamp', '<f4'),
+    ('rep', '<i4'),
+    ('stage', 'i1'),
+    ('progress', '<f4'),
+    ('visibility', '<f4')
+]
+
+
+def record_dtype(angles):
+    """Row layout of a record with the given angle columns"""
+    return np.dtype(BASE_COLUMNS + [(angle, '<f4') for angle in angles])
+
+
+class FrameRecordWriter:
+    """
+    Write the per-frame analysis results of one video to a compact binary file of fixed-width rows,
+    buffering RECORD_BATCH_FRAMES rows per write. exercise is the exercise dict, whose 'stages',
+    'angles' and 'joints' pick the stage codes, the angle columns and the joints behind the visibility
+    """
+
+    def __init__(self, path, exercise, batch_frames=RECORD_BATCH_FRAMES):
+        self.path = path
+        self.stages = exercise['stages']
+        self.angles = exercise['angles']
+        self.joints = list(exercise['joints'])
+        self.dtype = record_dtype(self.angles)
+        self.fps = None
+        self.frames_written = 0
+        self.missing_frames = 0
+        self.rep_frames = []
+        self._stage_codes = {name: code for code, name in enumerate(self.stages)}
+        self._buffer = np.zeros(batch_frames, dtype=self.dtype)
+        self._buffered = 0
+        self._last_rep = 0
+        self._file = open(path, 'wb')
+
+    def begin(self, video):
+        """Take the frame rate for the timestamps from the video properties of open_video"""
+        self.fps = video['fps'] or 1
+
+    def append(self, frame_count, landmarks, frame_state):
+        """Add the row of one frame from its (33, 4) landmarks (or None) and its state snapshot"""
+        row = self._buffer[self._buffered]
+        row['frame'] = frame_count
+        row['timestamp'] = (frame_count - 1) / self.fps
+        row['rep'] = frame_state['counter']
+        row['stage'] = self._stage_codes[frame_state['stage']]
+        row['progress'] = frame_state['progress_percentage']
+        row['visibility'] = np.nan if landmarks is None else landmarks[self.joints, 3].mean()
+        for angle in self.angles:
+            row[angle] = frame_state[angle]
+
+        self.missing_frames += landmarks is None or bool(np.isnan(landmarks[0, 0]))
+        if frame_state['counter'] > self._last_rep:
+            self.rep_frames.append(frame_count)
+            self._last_rep = frame_state['counter']
+
+        self._buffered += 1
+        if self._buffered == len(self._buffer):
+            self.flush()
+
+    def extend(self, video, frames, series):
+        """Add the rows of a whole analysed video from its per-frame state arrays and landmark series"""
+        self.begin(video)
+        self.flush()
+        count = len(series)
+        first = self.frames_written + 1
+
+        rows = np.zeros(count, dtype=self.dtype)
+        rows['frame'] = np.arange(first, first + count)
+        rows['timestamp'] = (rows['frame'] - 1) / self.fps
+        rows['rep'] = frames['counter']
+        rows['stage'] = np.fromiter((self._stage_codes[stage] for stage in frames['stage']), np.int8, count)
+        rows['progress'] = frames['progress_percentage']
+        rows['visibility'] = series[:, self.joints, 3].mean(axis=1)
+        for angle in self.angles:
+            rows[angle] = frames[angle]
+
+        self.missing_frames += int(np.isnan(series[:, 0, 0]).sum())
+        new_reps = np.flatnonzero(np.diff(rows['rep'], prepend=self._last_rep) > 0)
+        self.rep_frames.extend(rows['frame'][new_reps].tolist())
+        if count:
+            self._last_rep = int(rows['rep'][-1])
+
+        for start in range(0, count, len(self._buffer)):
+            rows[start:start + len(self._buffer)].tofile(self._file)
+        self.frames_written += count
+
+    def flush(self):
+        if self._buffered:
+            self._buffer[:self._buffered].tofile(self._file)
+            self.frames_written += self._buffered
+            self._buffered = 0
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def summary(self):
+        """JSON-ready description of the record: its file, row layout, stage names and rep events"""
+        fps = self.fps or 1
+        return {
+            'path': self.path,
+            'dtype': self.dtype.descr,
+            'stages': self.stages,
+            'frames': self.frames_written,
+            'fps': self.fps,
+            'missing_frames': self.missing_frames,
+            'rep_frames': self.rep_frames,
+            'rep_times': [round((frame - 1) / fps, 2) for frame in self.rep_frames]
+        }
+
+
+def build_summary(exercise_name, record, result, started, profiler=None, form_notes=()):
+    """
+    Assemble the JSON summary of an analysed upload from the closed record writer, the result dict of
+    process_exercise and the time processing started. form_notes are extra lines for the report
+    """
+    return {
+        'exercise': exercise_name,
+        'started': started.isoformat(),
+        'completed': datetime.now().isoformat(),
+        'frame_count': result['frame_count'],
+        'reps': result['reps'],
+        'landmarks_cached': result['landmarks_cached'],
+        'record': record.summary(),
+        'form_notes': list(form_notes),
+        'profile': profiler.finish() if profiler is not None else None
+    }
+
+
+def write_summary(path, summary):
+    with open(path, 'w') as f:
+        json.dump(summary, f, indent=2)
+
+
+def load_record(summary_path):
+    """
+    Load an analysis summary and its per-frame record.
+    Returns tuple of (summary, record) where record is a structured array with one field per column
+    """
+    with open(summary_path) as f:
+        summary = json.load(f)
+    dtype = np.dtype([tuple(field) for field in summary['record']['dtype']])
+    return summary, np.fromfile(summary['record']['path'], dtype=dtype)
+
+
+def render_report(summary, record):
+    """Render the human-readable analysis report of an upload from its summary and per-frame record"""
+    info = summary['record']
+    lines = [f"Processing started at: {datetime.fromisoformat(summary['started'])}"]
+    if summary['landmarks_cached']:
+        lines.append("Pose landmarks loaded from cache")
+
+    for rep, (frame, seconds) in enumerate(zip(info['rep_frames'], info['rep_times']), start=1):
+        lines.append(f"Rep {rep} completed at frame {frame} ({seconds:.2f}s)")
+
+    lines += [
+        "",
+        f"Processing completed at: {datetime.fromisoformat(summary['completed'])}",
+        f"Total frames processed: {summary['frame_count']}",
+        f"Total reps counted: {summary['reps']}",
+        f"Frames without a detected pose: {info['missing_frames']}"
+    ]
+
+    detected = record[~np.isnan(record['visibility'])] if len(record) else record
+    for name, _ in info['dtype'][len(BASE_COLUMNS):]:
+        values = detected[name][~np.isnan(detected[name])]
+        if len(values):
+            label = name.replace('_', ' ').capitalize()
+            lines.append(f"{label}: min {values.min():.1f}°, mean {values.mean():.1f}°, max {values.max():.1f}°")
+
+    if summary['form_notes'] and summary['reps'] > 0:
+        lines += ["", "Form Analysis Summary:"]
+        lines += [f"- {note}" for note in summary['form_notes']]
+        lines.append(f"- Average frames per rep: {summary['frame_count'] / summary['reps']:.1f}")
+
+    if summary['profile'] is not None:
+        lines += [""] + format_report(summary['profile'])
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,333 @@
+import json
+import os
+import re
+import tempfile
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .landmark_cache import hash_file
+from .specs import EXERCISE_SPECS
+from .video_io import prepare_for_browser
+
+DEMO_CACHE_DIR = Path(tempfile.gettempdir()) / 'streamlit_video_cache'
+
+# Drive's download endpoint, called with ?id=<file id>. Set DEMO_DOWNLOAD_URL to a local server
+# answering the same query (with Range support) to fetch the demos without Drive
+DRIVE_DOWNLOAD_URL = os.environ.get('DEMO_DOWNLOAD_URL', 'https://drive.google.com/uc')
+
+# Demo videos by exercise, the 'demo' of every spec. sha256 pins the downloaded source file, None accepts
+# any content. The digests of the Drive files have not been recorded, so these sources are not verified:
+# a download is only checked to be as long as the server reports. Fill in sha256 to verify every download
+DEMO_VIDEOS = {name: spec['demo'] for name, spec in EXERCISE_SPECS.items() if spec.get('demo')}
+
+# Demos downloaded and transcoded at the same time, also the size of the HTTP connection pool
+DEMO_WORKERS = 3
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+# Attempts per download, each one resuming from the bytes already on disk
+DOWNLOAD_ATTEMPTS = 3
+# (connect, read) timeouts in seconds
+DOWNLOAD_TIMEOUT = (10, 60)
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def get_drive_file_id(url):
+    """Extract file ID from Google Drive URL"""
+    patterns = [
+        r'https://drive\.google\.com/file/d/(.*?)/',  # Regular share URL
+        r'https://drive\.google\.com/open\?id=(.*?)(?:&|$)',  # Open URL
+        r'https://drive\.google\.com/uc\?.*?id=(.*?)(?:&|$)',  # Direct download URL
+    ]
+    for pattern in patterns:
+        match = re.search(pattern, url)
+        if match:
+            return match.group(1)
+    return None
+
+
+def open_session(pool_size=DEMO_WORKERS):
+    """HTTP session keeping up to pool_size connections per host alive for reuse across downloads"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def _request(session, url, offset):
+    """GET url from byte offset on, passing Drive's confirmation for files too large to scan for viruses"""
+    headers = {'Range': f"bytes={offset}-"} if offset else {}
+    response = session.get(url, headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT)
+    for key, value in response.cookies.items():
+        if key.startswith('download_warning'):
+            response.close()
+            response = session.get(f"{url}&confirm={value}", headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT)
+            break
+    return response
+
+
+def _total_size(response):
+    """Full size of the file from Content-Range or Content-Length, None when the server does not say"""
+    content_range = response.headers.get('Content-Range', '')
+    if '/' in content_range and not content_range.endswith('/*'):
+        return int(content_range.rsplit('/', 1)[1])
+    if response.status_code == 200 and 'Content-Length' in response.headers:
+        return int(response.headers['Content-Length'])
+    return None
+
+
+def _download_attempt(session, url, part_path):
+    """Append the rest of url to part_path. Raises OSError when the file ends short of its size"""
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    with _request(session, url, offset) as response:
+        if response.status_code == 416:
+            # Nothing left to send: the part file already holds the whole file, or is not a prefix of it
+            if _total_size(response) == offset:
+                return
+            os.unlink(part_path)
+            raise OSError(f"Partial download of {url} does not match the file, starting over")
+        response.raise_for_status()
+
+        if response.status_code != 206:
+            # The server ignored the range and sends the whole file
+            offset = 0
+        total = _total_size(response)
+        with open(part_path, 'ab' if offset else 'wb') as f:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                f.write(chunk)
+
+    size = os.path.getsize(part_path)
+    if total is not None and size != total:
+        raise OSError(f"Download of {url} stopped at {size} of {total} bytes")
+
+
+def download_resumable(session, url, path, expected_sha256=None, attempts=DOWNLOAD_ATTEMPTS):
+    """
+    Download url to path through a .part file that later attempts, and later calls after a crash,
+    resume with a Range request. The finished file is checked against expected_sha256 when given.
+    Raises the last error once all attempts failed, or ValueError on a checksum mismatch
+    """
+    part_path = f"{path}.part"
+    for attempt in range(attempts):
+        try:
+            _download_attempt(session, url, part_path)
+            break
+        except (requests.RequestException, OSError):
+            if attempt == attempts - 1:
+                raise
+
+    if expected_sha256 is not None and hash_file(part_path) != expected_sha256:
+        os.unlink(part_path)
+        raise ValueError(f"Checksum mismatch for {url}")
+    os.replace(part_path, path)
+    return path
+
+
+def fetch_demo(session, name, demo, cache_dir=DEMO_CACHE_DIR):
+    """
+    Download one demo video and make it browser playable.
+    Returns the path of the playable file in cache_dir, which the caller moves into place
+    """
+    file_id = get_drive_file_id(demo['url'])
+    if not file_id:
+        raise ValueError(f"Could not extract Google Drive file ID from {demo['url']}")
+
+    source = cache_dir / f"{name}_source.mp4"
+    download_resumable(session, f"{DRIVE_DOWNLOAD_URL}?id={file_id}&export=download", source, demo['sha256'])
+
+    converted = cache_dir / f"{name}_demo_h264.tmp.mp4"
+    try:
+        playable, action = prepare_for_browser(str(source), str(converted))
+        if playable is None:
+            raise RuntimeError(f"Could not convert the {name} demo video")
+    except BaseException:
+        for path in (source, converted):
+            if path.exists():
+                path.unlink()
+        raise
+    if action != 'original':
+        source.unlink()
+    return playable
+
+
+class DemoAssetStore:
+    """
+    Process-wide store of the demo videos, fetched in the background DEMO_WORKERS at a time over one
+    pooled HTTP session. Published demos are content-addressed files listed in a manifest with their
+    checksums, so a restart reuses every demo that still verifies. Sessions only read from the store:
+    lease() hands out the current file of a demo and counts the reference, and a file replaced by a
+    newer version is deleted once its last reference is released
+    """
+
+    def __init__(self, demos=DEMO_VIDEOS, cache_dir=DEMO_CACHE_DIR, workers=DEMO_WORKERS):
+        self.demos = demos
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._manifest_path = self.cache_dir / MANIFEST_NAME
+        self._lock = threading.Lock()
+        self._session = open_session(workers)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='demo-assets')
+        self._futures = {}
+        self._refs = {}
+        self._retired = set()
+        self._manifest = self._load_manifest()
+        self._remove_unlisted()
+
+    def _load_manifest(self):
+        try:
+            with open(self._manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Entries of demos whose source changed are fetched again
+        return {name: entry for name, entry in manifest.items()
+                if name in self.demos and entry.get('url') == self.demos[name]['url']}
+
+    def _save_manifest(self):
+        fd, tmp_manifest = tempfile.mkstemp(dir=self.cache_dir, suffix='.json.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self._manifest, f, indent=2)
+        os.replace(tmp_manifest, self._manifest_path)
+
+    def _remove_unlisted(self):
+        """Delete demo files no manifest entry points to, left over from replaced versions or interrupted runs"""
+        listed = {entry['file'] for entry in self._manifest.values()}
+        for path in self.cache_dir.glob('*_demo_h264*'):
+            if path.name not in listed:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def start(self, names=None):
+        """Verify or fetch the given demos (default all) in the background, skipping ones already being fetched"""
+        with self._lock:
+            for name in names or self.demos:
+                future = self._futures.get(name)
+                if future is None or future.done():
+                    self._futures[name] = self._executor.submit(self._fetch, name)
+        return self
+
+    def _fetch(self, name):
+        with self._lock:
+            entry = self._manifest.get(name)
+        if entry is not None:
+            path = self.cache_dir / entry['file']
+            try:
+                if hash_file(path) == entry['sha256']:
+                    return str(path)
+            except OSError:
+                pass
+            with self._lock:
+                self._unlist(name)
+
+        playable = fetch_demo(self._session, name, self.demos[name], self.cache_dir)
+        digest = hash_file(playable)
+        target = self.cache_dir / f"{name}_demo_h264.{digest[:12]}.mp4"
+
+        with self._lock:
+            self._unlist(name)
+            # Unchanged content gets the name of the version it replaces, which must then be kept
+            self._retired.discard(str(target))
+            os.replace(playable, target)
+            self._manifest[name] = {'file': target.name, 'sha256': digest, 'size': target.stat().st_size,
+                                    'url': self.demos[name]['url']}
+            self._save_manifest()
+        return str(target)
+
+    def _unlist(self, name):
+        """Drop a demo from the manifest, deleting its file now or once its last lease is released"""
+        entry = self._manifest.pop(name, None)
+        if entry is None:
+            return
+        self._save_manifest()
+        path = str(self.cache_dir / entry['file'])
+        self._retired.add(path)
+        if not self._refs.get(path):
+            self._delete(path)
+
+    def _delete(self, path):
+        self._retired.discard(path)
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+    def _release(self, path):
+        self._refs[path] -= 1
+        if not self._refs[path]:
+            del self._refs[path]
+            if path in self._retired:
+                self._delete(path)
+
+    def pending(self, name):
+        """Whether a demo is still being verified or fetched"""
+        future = self._futures.get(name)
+        return future is not None and not future.done()
+
+    def lease(self, name, held=None):
+        """
+        Take a reference to the current file of a demo, releasing held (a path leased before) when it changed.
+        Returns tuple of (path, error) where both are None while the demo is still being fetched
+        """
+        with self._lock:
+            entry = self._manifest.get(name)
+            path = str(self.cache_dir / entry['file']) if entry is not None else None
+            if path != held:
+                if path is not None:
+                    self._refs[path] = self._refs.get(path, 0) + 1
+                if held is not None:
+                    self._release(held)
+
+            future = self._futures.get(name)
+            if path is not None or (future is not None and not future.done()):
+                return path, None
+            if name not in self.demos:
+                return None, f"No demo video for {name}"
+            if future is not None and future.exception() is not None:
+                return None, str(future.exception())
+            return None, "Demo video is not available"
+
+    def release_all(self, held):
+        """Release every path in held, a dict of demo name -> leased path, and empty it"""
+        with self._lock:
+            for path in held.values():
+                self._release(path)
+            held.clear()
+
+    def refresh(self, names=None):
+        """
+        Fetch the given demos (default all) again. Sessions keep showing the files they hold,
+        which are deleted once released
+        """
+        with self._lock:
+            for name in names or self.demos:
+                if not self.pending(name):
+                    self._unlist(name)
+        return self.start(names)
+
+
+class DemoLease:
+    """A session's references into a DemoAssetStore, released when the session state holding it is collected"""
+
+    def __init__(self, store):
+        self.store = store
+        self._held = {}
+        weakref.finalize(self, store.release_all, self._held)
+
+    def get(self, name):
+        """Path of a demo, see DemoAssetStore.lease"""
+        path, error = self.store.lease(name, self._held.get(name))
+        if path is None:
+            self._held.pop(name, None)
+        else:
+            self._held[name] = path
+        return path, error
+
+    def release(self):
+        self.store.release_all(self._held)
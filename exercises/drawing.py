@@ -0,0 +1,100 @@
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from .landmarks import VISIBILITY
+
+mp_pose = mp.solutions.pose
+
+# Skeleton style shared by all exercise overlays, the same values the mp_drawing.DrawingSpecs used
+LANDMARK_SPEC = {'color': (245, 117, 66), 'thickness': 2, 'circle_radius': 2}
+CONNECTION_SPEC = {'color': (245, 66, 230), 'thickness': 2}
+# Border drawn around every landmark, as mp_drawing does
+BORDER_COLOR = (224, 224, 224)
+
+# Landmarks below this visibility are not drawn (the mp_drawing threshold)
+VISIBILITY_THRESHOLD = 0.5
+
+# Start and end landmark of every skeleton connection
+CONNECTIONS = np.array(sorted(mp_pose.POSE_CONNECTIONS), dtype=np.intp)
+
+
+def _circle_offsets(radius, thickness):
+    """Offsets (dy, dx) from the center of the pixels cv2.circle draws for a circle outline"""
+    center = radius + thickness
+    canvas = np.zeros((2 * center + 1, 2 * center + 1), dtype=np.uint8)
+    cv2.circle(canvas, (center, center), radius, 1, thickness)
+    dy, dx = np.nonzero(canvas)
+    return dy - center, dx - center
+
+
+# Landmark markers are stamped from precomputed pixel offsets instead of two cv2.circle calls per landmark.
+# The offsets are in mp_drawing's order: the border first, then the fill drawn over it
+_BORDER_OFFSETS = _circle_offsets(max(LANDMARK_SPEC['circle_radius'] + 1, int(LANDMARK_SPEC['circle_radius'] * 1.2)),
+                                  LANDMARK_SPEC['thickness'])
+_FILL_OFFSETS = _circle_offsets(LANDMARK_SPEC['circle_radius'], LANDMARK_SPEC['thickness'])
+_MARKER_DY = np.concatenate([_BORDER_OFFSETS[0], _FILL_OFFSETS[0]])
+_MARKER_DX = np.concatenate([_BORDER_OFFSETS[1], _FILL_OFFSETS[1]])
+_MARKER_COLOR_INDEX = np.repeat([0, 1], [len(_BORDER_OFFSETS[0]), len(_FILL_OFFSETS[0])])
+_MARKER_COLORS = np.array([BORDER_COLOR, LANDMARK_SPEC['color']], dtype=np.uint8)
+# Markers whose centers are at least this far apart (on either axis) cannot overlap
+_MARKER_SIZE = 2 * max(np.abs(_MARKER_DY).max(), np.abs(_MARKER_DX).max()) + 1
+
+
+def landmarks_to_pixels(landmarks, width, height, visibility_threshold=VISIBILITY_THRESHOLD):
+    """
+    Convert all (33, 4) landmarks to pixel coordinates at once.
+    Returns tuple of (pixels, drawn) where pixels is an int32 (33, 2) array of (x, y) and drawn marks
+    the landmarks that are visible enough and inside the frame
+    """
+    xy = landmarks[:, :2]
+    with np.errstate(invalid='ignore'):
+        drawn = (landmarks[:, VISIBILITY] >= visibility_threshold) & np.all((xy >= 0) & (xy <= 1), axis=1)
+        pixels = np.minimum(np.floor(xy * (width, height)), (width - 1, height - 1))
+    return np.where(drawn[:, None], pixels, 0).astype(np.int32), drawn
+
+
+def _draw_markers(image, points):
+    """Stamp the landmark markers at every point with indexed writes, clipped to the image"""
+    ys = points[:, 1, None] + _MARKER_DY
+    xs = points[:, 0, None] + _MARKER_DX
+    colors = np.broadcast_to(_MARKER_COLOR_INDEX, ys.shape)
+    inside = (ys >= 0) & (ys < image.shape[0]) & (xs >= 0) & (xs < image.shape[1])
+
+    x, y = points[:, 0], points[:, 1]
+    gaps = np.maximum(np.abs(x[:, None] - x), np.abs(y[:, None] - y))
+    np.fill_diagonal(gaps, _MARKER_SIZE)
+    if not len(points) or gaps.min() >= _MARKER_SIZE:
+        # No markers overlap: all borders, then all fills
+        border = inside & (colors == 0)
+        image[ys[border], xs[border]] = _MARKER_COLORS[0]
+        fill = inside & (colors == 1)
+        image[ys[fill], xs[fill]] = _MARKER_COLORS[1]
+        return
+
+    # Where markers overlap, the one drawn last wins, as with consecutive cv2.circle calls
+    ys, xs, colors = ys[inside], xs[inside], colors[inside]
+    _, last = np.unique((ys * image.shape[1] + xs)[::-1], return_index=True)
+    last = len(ys) - 1 - last
+    image[ys[last], xs[last]] = _MARKER_COLORS[colors[last]]
+
+
+def draw_pose_landmarks(image, landmarks, visibility_threshold=VISIBILITY_THRESHOLD):
+    """
+    Draw the pose skeleton from a (33, 4) landmark array, doing nothing when landmarks is None.
+    All connections go out in one cv2.polylines call and the landmark markers are stamped in one
+    vectorized write. The result is visually equivalent to mp_drawing.draw_landmarks, though edges may differ
+    by a pixel where the lines meet the markers
+    """
+    if landmarks is None:
+        return
+
+    height, width = image.shape[:2]
+    pixels, drawn = landmarks_to_pixels(landmarks, width, height, visibility_threshold)
+
+    # A connection is drawn when both of its landmarks are
+    segments = pixels[CONNECTIONS[drawn[CONNECTIONS].all(axis=1)]]
+    if len(segments):
+        cv2.polylines(image, list(segments), False, CONNECTION_SPEC['color'], CONNECTION_SPEC['thickness'])
+
+    _draw_markers(image, pixels[drawn])
@@ -0,0 +1,150 @@
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+TEXT_COLOR = (255, 255, 255)
+PANEL_COLOR = (245, 117, 16)
+PANEL_ALPHA = 0.3
+BAR_BACKGROUND = (200, 200, 200)
+BAR_FILL = (255, 0, 255)
+
+# HUD styles: size of the tinted stats panel, its static labels as (text, origin, scale, thickness),
+# and the origin, scale and thickness of the counter and stage text
+COMPACT_STYLE = {
+    'name': 'compact',
+    'panel': (180, 60),
+    'labels': [('REPS', (10, 12), 0.4, 1), ('STAGE', (10, 42), 0.4, 1)],
+    'counter': ((10, 28), 0.5, 1),
+    'stage': ((10, 58), 0.5, 1),
+    'percentage': None
+}
+
+LARGE_STYLE = {
+    'name': 'large',
+    'panel': (225, 100),
+    'labels': [('REPS', (10, 20), 0.8, 2), ('STAGE:', (10, 75), 0.8, 2)],
+    'counter': ((10, 50), 0.9, 3),
+    'stage': ((10, 100), 0.9, 3),
+    # Percentage text, offset from the bottom-left corner of the progress bar
+    'percentage': ((-20, 30), 0.7, 2)
+}
+
+# Styles by name, as specs refer to them
+HUD_STYLES = {style['name']: style for style in (COMPACT_STYLE, LARGE_STYLE)}
+
+# Capture-to-display latency readout of the live trackers: (left margin, bottom margin), scale, thickness
+LATENCY_TEXT = ((10, 10), 0.5, 1)
+
+# Static panel layers per (style name, panel height, panel width) of the panel clipped to the frame, so
+# every frame at least as large as the panel shares one entry per style
+_static_layers = {}
+
+
+@lru_cache(maxsize=1024)
+def glyph(text, scale, thickness):
+    """
+    Render a text once as an anti-aliased coverage mask.
+    Returns tuple of (alpha, (dx, dy)) where alpha is a read-only float32 (h, w, 1) mask and (dx, dy)
+    the offset of its top-left corner from the putText origin
+    """
+    (width, height), baseline = cv2.getTextSize(text, FONT, scale, thickness)
+    pad = thickness + 1
+    mask = np.zeros((height + baseline + 2 * pad, width + 2 * pad), dtype=np.uint8)
+    cv2.putText(mask, text, (pad, height + pad), FONT, scale, 255, thickness, cv2.LINE_AA)
+
+    alpha = (mask.astype(np.float32) / 255)[..., None]
+    alpha.flags.writeable = False
+    return alpha, (-pad, -height - pad)
+
+
+def _clip(image, x, y, height, width):
+    """Slices of the part of a height x width box at (x, y) that lies inside the image, and of the box itself"""
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + width, image.shape[1]), min(y + height, image.shape[0])
+    if x0 >= x1 or y0 >= y1:
+        return None
+    return (slice(y0, y1), slice(x0, x1)), (slice(y0 - y, y1 - y), slice(x0 - x, x1 - x))
+
+
+def draw_text(image, text, org, scale, thickness, color=TEXT_COLOR):
+    """Drop-in for cv2.putText that composites a cached glyph, blending only the pixels under the text"""
+    if not text:
+        return
+    alpha, (dx, dy) = glyph(text, scale, thickness)
+    clipped = _clip(image, org[0] + dx, org[1] + dy, *alpha.shape[:2])
+    if clipped is None:
+        return
+
+    target, source = clipped
+    roi = image[target]
+    a = alpha[source]
+    roi[...] = roi * (1 - a) + (np.asarray(color, dtype=np.float32) * a + 0.5)
+
+
+def _static_layer(style, frame_height, frame_width):
+    """
+    Pre-render the tinted panel and its labels for one frame size.
+    Returns tuple of (keep, add) so that blending the panel is roi * keep + add
+    """
+    # cv2.rectangle includes its end point
+    panel_width, panel_height = style['panel']
+    height, width = min(panel_height + 1, frame_height), min(panel_width + 1, frame_width)
+    key = (style['name'], height, width)
+    layer = _static_layers.get(key)
+    if layer is not None:
+        return layer
+
+    panel = np.zeros((height, width, 3), dtype=np.uint8)
+
+    alpha = np.zeros((height, width, 1), dtype=np.float32)
+    for text, (x, y), scale, thickness in style['labels']:
+        label, (dx, dy) = glyph(text, scale, thickness)
+        clipped = _clip(panel, x + dx, y + dy, *label.shape[:2])
+        if clipped is not None:
+            target, source = clipped
+            np.maximum(alpha[target], label[source], out=alpha[target])
+
+    keep = (1 - PANEL_ALPHA) * (1 - alpha)
+    add = (PANEL_ALPHA * np.asarray(PANEL_COLOR, dtype=np.float32)) * (1 - alpha) + 255 * alpha + 0.5
+    layer = _static_layers[key] = (keep, add)
+    return layer
+
+
+def draw_progress_bar(image, progress_bar, progress_percentage):
+    """Fill the progress bar background and its filled part with plain slice assignments"""
+    x, y = progress_bar['x'], progress_bar['y_start']
+    width, height = progress_bar['width'], progress_bar['height']
+    filled_height = int((progress_percentage / 100) * height)
+
+    image[y:y + height + 1, x:x + width + 1] = BAR_BACKGROUND
+    image[max(y + height - filled_height, 0):y + height + 1, x:x + width + 1] = BAR_FILL
+
+
+def draw_hud(image, style, progress_bar, counter, stage, progress_percentage):
+    """
+    Draw the stats panel, rep counter, stage and progress bar of an exercise overlay.
+    Only the panel area is blended, using the layer pre-rendered for this frame size
+    """
+    keep, add = _static_layer(style, *image.shape[:2])
+    roi = image[:keep.shape[0], :keep.shape[1]]
+    roi[...] = roi * keep + add
+
+    org, scale, thickness = style['counter']
+    draw_text(image, str(counter), org, scale, thickness)
+    org, scale, thickness = style['stage']
+    draw_text(image, stage if stage else "", org, scale, thickness)
+
+    draw_progress_bar(image, progress_bar, progress_percentage)
+
+    if style['percentage'] is not None:
+        (dx, dy), scale, thickness = style['percentage']
+        org = (progress_bar['x'] + dx, progress_bar['y_start'] + progress_bar['height'] + dy)
+        draw_text(image, f'{progress_percentage}%', org, scale, thickness)
+
+
+def draw_latency(image, latency_ms):
+    """Show the capture-to-display latency of a live frame in the bottom-left corner"""
+    (x, margin), scale, thickness = LATENCY_TEXT
+    draw_text(image, f'Latency: {latency_ms:.0f} ms', (x, image.shape[0] - margin), scale, thickness)
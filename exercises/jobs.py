@@ -0,0 +1,161 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Jobs running at the same time. Each one may still split a long video across worker processes
+MAX_CONCURRENT_JOBS = 2
+
+# Finished jobs and their files are dropped after this many seconds
+JOB_RETENTION_SECONDS = 2 * 60 * 60
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = 'queued', 'running', 'done', 'failed', 'cancelled'
+FINISHED_STATUSES = {DONE, FAILED, CANCELLED}
+
+
+class JobCancelled(Exception):
+    """Raised from a job's progress callback once the job has been cancelled"""
+
+
+class Job:
+    """
+    One background job and its progress, read by the page that polls it.
+    status goes from queued to running to done, failed or cancelled. files lists temporary files
+    owned by the job, removed when it is cancelled or discarded
+    """
+
+    def __init__(self, name, files=()):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.status = QUEUED
+        self.stage = None
+        self.frames_done = 0
+        self.frame_count = 0
+        self.result = None
+        self.error = None
+        self.files = list(files)
+        self.submitted_at = time.time()
+        self.finished_at = None
+        self._stage_started = None
+        self._cancel_event = threading.Event()
+
+    def progress(self, stage, frames_done=0, frame_count=0):
+        """Progress callback for the processors. Raises JobCancelled once the job was cancelled"""
+        if self._cancel_event.is_set():
+            raise JobCancelled(f"Job {self.id} was cancelled")
+        if stage != self.stage:
+            self.stage = stage
+            self._stage_started = time.perf_counter()
+        self.frames_done, self.frame_count = frames_done, frame_count
+
+    @property
+    def fraction(self):
+        """Share of the current stage that is done, None while it is unknown"""
+        if not self.frame_count:
+            return None
+        return min(self.frames_done / self.frame_count, 1.0)
+
+    def eta(self):
+        """Seconds until the current stage is done at its rate so far, None while it is unknown"""
+        if not self.frames_done or not self.frame_count or self._stage_started is None:
+            return None
+        elapsed = time.perf_counter() - self._stage_started
+        return max(self.frame_count - self.frames_done, 0) * elapsed / self.frames_done
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATUSES
+
+    @property
+    def cancel_requested(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        """Ask the job to stop. A queued job never starts, a running one stops at its next progress call"""
+        self._cancel_event.set()
+
+    def remove_files(self):
+        for path in self.files:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        self.files = []
+
+
+class JobQueue:
+    """
+    Runs jobs in a bounded pool of background threads, so script runs only submit and poll them.
+    Jobs are looked up by id, which lets a page find its job again after a rerun
+    """
+
+    def __init__(self, max_workers=MAX_CONCURRENT_JOBS):
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix='job')
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._discarded = set()
+
+    def submit(self, name, fn, *args, files=(), **kwargs):
+        """
+        Queue fn(job, *args, **kwargs) and return the job id. fn should pass job.progress to the
+        processors; its return value becomes job.result. files are removed together with the job
+        """
+        self.evict_finished()
+        job = Job(name, files)
+        with self._lock:
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job.id
+
+    def _run(self, job, fn, args, kwargs):
+        try:
+            if job.cancel_requested:
+                raise JobCancelled(f"Job {job.id} was cancelled")
+            job.status = RUNNING
+            job.result = fn(job, *args, **kwargs)
+            job.status = DONE
+        except JobCancelled:
+            job.status = CANCELLED
+        except Exception as e:
+            job.error = e
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                discarded = job.id in self._discarded
+                self._discarded.discard(job.id)
+            if discarded or job.status == CANCELLED:
+                job.remove_files()
+
+    def get(self, job_id):
+        """The job with this id, None once it was discarded or evicted"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel()
+
+    def discard(self, job_id):
+        """Forget a job, cancelling it if it is still running, and remove its files"""
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+            if job is not None and not job.finished:
+                # Its files are removed by _run once it has stopped using them
+                self._discarded.add(job_id)
+        if job is None:
+            return
+        job.cancel()
+        if job.finished:
+            job.remove_files()
+
+    def evict_finished(self, max_age=JOB_RETENTION_SECONDS):
+        """Discard jobs that finished more than max_age seconds ago"""
+        cutoff = time.time() - max_age
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.finished and job.finished_at < cutoff]
+        for job_id in expired:
+            self.discard(job_id)
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Landmark series are small (528 bytes per frame), so this holds several hours of footage
+CACHE_DIR = Path(tempfile.gettempdir()) / 'pose_landmark_cache'
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path):
+    """Compute the SHA-256 of a file's content, reading it in fixed-size chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(content_hash, pose_settings):
+    """Build the cache key from the video content hash and the pose model settings"""
+    settings = json.dumps(pose_settings, sort_keys=True)
+    return hashlib.sha256(f"{content_hash}:{settings}".encode()).hexdigest()
+
+
+def _paths(key, cache_dir):
+    return cache_dir / f"{key}.npy", cache_dir / f"{key}.json"
+
+
+def load_landmarks(key, cache_dir=CACHE_DIR):
+    """
+    Load a cached landmark series as a read-only memory map.
+    Returns tuple of (series, video_properties) or None on a cache miss
+    """
+    series_path, meta_path = _paths(key, cache_dir)
+    try:
+        with open(meta_path) as f:
+            video = json.load(f)
+        series = np.load(series_path, mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+
+    # Mark the entry as recently used for LRU eviction
+    try:
+        os.utime(series_path)
+    except OSError:
+        pass
+    return series, video
+
+
+def save_landmarks(key, series, video, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+    """Store a landmark series and its video properties, then evict old entries over the size limit"""
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    series_path, meta_path = _paths(key, cache_dir)
+
+    # Write to temporary names first so readers never see a partial entry
+    fd, tmp_series = tempfile.mkstemp(dir=cache_dir, suffix='.npy.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        np.save(f, np.ascontiguousarray(series, dtype=np.float32))
+    fd, tmp_meta = tempfile.mkstemp(dir=cache_dir, suffix='.json.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(video, f)
+
+    os.replace(tmp_series, series_path)
+    os.replace(tmp_meta, meta_path)
+
+    evict(max_bytes, cache_dir)
+
+
+def evict(max_bytes=MAX_CACHE_BYTES, cache_dir=CACHE_DIR):
+    """Delete the least recently used entries until the cache fits in max_bytes"""
+    entries = []
+    for series_path in cache_dir.glob('*.npy'):
+        try:
+            stat = series_path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, series_path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, series_path in sorted(entries):
+        if total <= max_bytes:
+            break
+        for path in (series_path, series_path.with_suffix('.json')):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        total -= size
@@ -0,0 +1,119 @@
+import numpy as np
+
+# MediaPipe Pose returns 33 landmarks, each stored as (x, y, z, visibility)
+NUM_LANDMARKS = 33
+X, Y, Z, VISIBILITY = 0, 1, 2, 3
+
+# Landmark indices, matching mp.solutions.pose.PoseLandmark
+LEFT_SHOULDER = 11
+RIGHT_SHOULDER = 12
+LEFT_ELBOW = 13
+RIGHT_ELBOW = 14
+LEFT_WRIST = 15
+RIGHT_WRIST = 16
+LEFT_HIP = 23
+RIGHT_HIP = 24
+LEFT_KNEE = 25
+RIGHT_KNEE = 26
+LEFT_ANKLE = 27
+RIGHT_ANKLE = 28
+
+
+def landmarks_to_array(pose_landmarks):
+    """
+    Convert MediaPipe pose_landmarks into a float32 (33, 4) array of (x, y, z, visibility).
+    Returns None when no pose was detected
+    """
+    if pose_landmarks is None:
+        return None
+    return np.array(
+        [(lm.x, lm.y, lm.z, lm.visibility) for lm in pose_landmarks.landmark],
+        dtype=np.float32
+    )
+
+
+def empty_series(frame_count):
+    """Allocate an (N, 33, 4) landmark series filled with NaN for frames without a pose"""
+    return np.full((frame_count, NUM_LANDMARKS, 4), np.nan, dtype=np.float32)
+
+
+def frame_landmarks(series, index):
+    """Return the (33, 4) landmarks of one frame in a series, or None when no pose was detected"""
+    landmarks = series[index]
+    if np.isnan(landmarks[0, X]):
+        return None
+    return landmarks
+
+
+def sample_frames(frame_count, stride):
+    """Indices of the frames that go through pose estimation when analysing every stride-th frame"""
+    return np.arange(0, frame_count, max(1, stride))
+
+
+def interpolate_series(samples, sampled, frame_count):
+    """
+    Fill in landmarks for the frames skipped between pose samples.
+
+    samples is the (S, 33, 4) landmarks of the frames listed in sampled (ascending, starting at 0).
+    Skipped frames are linearly interpolated between the surrounding samples, NaN when either sample
+    has no pose, and frames after the last sample repeat it. Returns an (N, 33, 4) series
+    """
+    frames = np.arange(frame_count)
+    previous = np.searchsorted(sampled, frames, side='right') - 1
+    following = np.minimum(previous + 1, len(sampled) - 1)
+
+    span = (sampled[following] - sampled[previous]).astype(np.float32)
+    t = np.divide(frames - sampled[previous], span, out=np.zeros(frame_count, dtype=np.float32), where=span > 0)
+    t = t[:, None, None]
+    return ((1 - t) * samples[previous] + t * samples[following]).astype(np.float32)
+
+
+def interpolate_landmarks(start, end, t):
+    """Interpolate between two (33, 4) landmark arrays, None when either has no pose"""
+    if start is None or end is None:
+        return None
+    return ((1 - t) * start + t * end).astype(np.float32)
+
+
+def _fold_angle(radians):
+    """Convert radians to degrees folded into the 0-180 range"""
+    angle = np.abs(np.degrees(radians))
+    return np.where(angle > 180.0, 360.0 - angle, angle)
+
+
+def batch_angles(landmarks, triplets):
+    """
+    Calculate the angle at b for every (a, b, c) joint triplet.
+
+    landmarks is a (33, 4) frame or an (N, 33, 4) series, triplets a sequence of index triplets.
+    Returns an array of shape (K,) or (N, K) in degrees, NaN where the pose is missing
+    """
+    triplets = np.asarray(triplets, dtype=np.intp).reshape(-1, 3)
+    a = landmarks[..., triplets[:, 0], :2]
+    b = landmarks[..., triplets[:, 1], :2]
+    c = landmarks[..., triplets[:, 2], :2]
+    radians = (np.arctan2(c[..., 1] - b[..., 1], c[..., 0] - b[..., 0])
+               - np.arctan2(a[..., 1] - b[..., 1], a[..., 0] - b[..., 0]))
+    return _fold_angle(radians)
+
+
+def batch_angles_x_axis(landmarks, pairs):
+    """
+    Calculate the angle between the x-axis and the line from b to a for every (a, b) pair.
+    Returns an array of shape (K,) or (N, K) in degrees
+    """
+    pairs = np.asarray(pairs, dtype=np.intp).reshape(-1, 2)
+    a = landmarks[..., pairs[:, 0], :2]
+    b = landmarks[..., pairs[:, 1], :2]
+    radians = np.arctan2(a[..., 1] - b[..., 1], a[..., 0] - b[..., 0])
+    return _fold_angle(radians)
+
+
+def calculate_angle(a, b, c):
+    """Calculate angle between three points"""
+    return float(batch_angles(np.array([a, b, c], dtype=np.float64), [(0, 1, 2)])[0])
+
+
+def calculate_angle_x_axis(a, b):
+    """Calculate angle between two points and x-axis"""
+    return float(batch_angles_x_axis(np.array([a, b], dtype=np.float64), [(0, 1)])[0])
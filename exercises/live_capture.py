@@ -0,0 +1,153 @@
+import threading
+import time
+
+import cv2
+
+from .hud import draw_latency
+from .landmarks import landmarks_to_array
+from .pose_pool import POSE_POOL, POSE_SETTINGS
+
+# Frames the camera driver may buffer. Older frames are dropped by the capture thread anyway,
+# a small driver buffer just keeps the newest frame from waiting behind stale ones
+CAPTURE_BUFFER_SIZE = 1
+
+
+class LatestFrameCapture:
+    """
+    Read a cv2.VideoCapture on a background thread, keeping only the newest frame.
+    When inference is slower than the camera, older frames are dropped instead of queueing up,
+    so the loop always works on what the camera sees now. With pace_fps set, frames are read
+    no faster than that rate, so a video file behaves like a camera. Closing it releases the capture
+    """
+
+    def __init__(self, cap, pace_fps=None):
+        self.cap = cap
+        self.pace_fps = pace_fps
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, CAPTURE_BUFFER_SIZE)
+        self.dropped_frames = 0
+        self._condition = threading.Condition()
+        self._frame = None
+        self._captured_at = None
+        self._sequence = 0
+        self._last_read = 0
+        self._ended = False
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._capture, daemon=True)
+
+    def _capture(self):
+        next_frame_at = time.perf_counter()
+        while not self._stop_event.is_set():
+            if self.pace_fps:
+                next_frame_at += 1 / self.pace_fps
+                self._stop_event.wait(max(next_frame_at - time.perf_counter(), 0))
+            ret, frame = self.cap.read()
+            captured_at = time.perf_counter()
+            with self._condition:
+                if not ret:
+                    self._ended = True
+                    self._condition.notify_all()
+                    return
+                if self._sequence > self._last_read:
+                    self.dropped_frames += 1
+                self._frame, self._captured_at = frame, captured_at
+                self._sequence += 1
+                self._condition.notify_all()
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def read(self, timeout=None):
+        """
+        Wait for a frame newer than the last one returned.
+        Returns tuple of (ret, frame, captured_at) where captured_at is the time.perf_counter() at which
+        the frame came out of the camera; ret is False once the capture has ended or timeout expired
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._sequence > self._last_read or self._ended, timeout)
+            if self._sequence == self._last_read:
+                return False, None, None
+            self._last_read = self._sequence
+            return True, self._frame, self._captured_at
+
+    def release(self):
+        """Stop the capture thread and release the capture"""
+        self._stop_event.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.cap.release()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+def open_live_source(source=0):
+    """
+    Open a webcam index or a video file for live tracking as a LatestFrameCapture.
+    A video file is read at its own frame rate, so it can stand in for the webcam, e.g. on a headless server
+    """
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise ValueError(f"Error: Could not open video source {source}")
+
+    pace_fps = cap.get(cv2.CAP_PROP_FPS) if isinstance(source, str) else None
+    return LatestFrameCapture(cap, pace_fps or None)
+
+
+def live_exercise_frames(exercise, source=0):
+    """
+    Track a compiled exercise (see rep_engine.compile_exercise) on a live source, a webcam index or a video
+    file read at its own frame rate, with the same per-frame kernel as the uploaded videos.
+    Yields tuple of (image, state) for every processed frame, where image is the annotated BGR frame
+    and state holds counter, stage, progress_percentage and latency_ms. Closing the generator
+    releases the camera and the pose graph. Raises pose_pool.PoseEngineBusy when no graph is free
+    """
+    state = exercise['init_state']()
+    frame_count = 0
+
+    # Inference always runs on the newest camera frame, older ones are dropped
+    with open_live_source(source) as capture, POSE_POOL.checkout(POSE_SETTINGS) as pose:
+        while True:
+            ret, frame, captured_at = capture.read()
+            if not ret:
+                break
+            frame_count += 1
+
+            if exercise['mirror_live']:
+                # Flip the frame horizontally for natural mirroring
+                frame = cv2.flip(frame, 1)
+
+            image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            image.flags.writeable = False
+            landmarks = landmarks_to_array(pose.process(image).pose_landmarks)
+
+            exercise['update_state'](state, landmarks, frame_count)
+
+            # The captured frame is untouched by inference, so the overlay is drawn on it directly
+            exercise['draw_frame'](frame, landmarks, state)
+
+            # Time from the camera to the finished overlay
+            latency_ms = (time.perf_counter() - captured_at) * 1000
+            draw_latency(frame, latency_ms)
+
+            yield frame, {
+                'counter': state['counter'],
+                'stage': state['stage'],
+                'progress_percentage': state['progress_percentage'],
+                'latency_ms': latency_ms
+            }
+
+
+def show_in_window(frames, window_name):
+    """Display the frames yielded by a live tracker in an OpenCV window until it ends or 'q' is pressed"""
+    try:
+        for image, _ in frames:
+            cv2.imshow(window_name, image)
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+    finally:
+        frames.close()
+        cv2.destroyAllWindows()
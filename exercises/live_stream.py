@@ -0,0 +1,53 @@
+import time
+
+import cv2
+
+# Live frames sent to the page: frame rate cap, bandwidth budget, widest frame and JPEG quality bounds
+STREAM_MAX_FPS = 15
+STREAM_MAX_KBPS = 8000
+STREAM_MAX_WIDTH = 960
+STREAM_QUALITY_RANGE = (40, 85)
+STREAM_QUALITY_STEP = 5
+
+
+class AdaptiveJpegEncoder:
+    """
+    JPEG-encode live frames for display in the page.
+    Frames arriving faster than max_fps are skipped, and the quality is lowered while the stream
+    is over max_kbps and raised again once it is well under it
+    """
+
+    def __init__(self, max_fps=STREAM_MAX_FPS, max_kbps=STREAM_MAX_KBPS, max_width=STREAM_MAX_WIDTH,
+                 quality_range=STREAM_QUALITY_RANGE):
+        self.max_fps = max_fps
+        self.max_kbps = max_kbps
+        self.max_width = max_width
+        self.min_quality, self.max_quality = quality_range
+        self.quality = self.max_quality
+        self.kbps = 0.0
+        self._last_sent = None
+
+    def encode(self, image):
+        """Return the JPEG bytes of a BGR frame, or None when the frame is skipped to hold the frame rate"""
+        now = time.perf_counter()
+        interval = 1 / self.max_fps
+        if self._last_sent is not None:
+            if now - self._last_sent < interval:
+                return None
+            interval = now - self._last_sent
+        self._last_sent = now
+
+        if image.shape[1] > self.max_width:
+            height = int(image.shape[0] * self.max_width / image.shape[1])
+            image = cv2.resize(image, (self.max_width, height), interpolation=cv2.INTER_AREA)
+
+        ok, jpeg = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            return None
+
+        self.kbps = len(jpeg) * 8 / 1000 / interval
+        if self.kbps > self.max_kbps:
+            self.quality = max(self.quality - STREAM_QUALITY_STEP, self.min_quality)
+        elif self.kbps < 0.6 * self.max_kbps:
+            self.quality = min(self.quality + STREAM_QUALITY_STEP, self.max_quality)
+        return jpeg.tobytes()
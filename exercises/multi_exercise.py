@@ -0,0 +1,103 @@
+import os
+import tempfile
+from datetime import datetime
+
+import numpy as np
+
+from .analysis_record import FrameRecordWriter, build_summary, write_summary
+from .profiling import timed
+from .rep_analysis import summarize_reps
+from .rep_engine import EXERCISES
+from .video_engine import DEFAULT_ANALYSIS_FPS, landmark_series, analyze_landmarks, render_video
+
+# An exercise is only detected when at least this share of the frames with a pose is in its posture
+MIN_POSTURE_SHARE = 0.5
+
+
+def classify_exercise(series, analyses, exercises=EXERCISES):
+    """
+    Tell which exercise a landmark series shows from the rep analyses of every candidate.
+    An exercise scores its rep count weighted by the share of frames with a pose spent in its posture.
+    Returns tuple of (detected, scores) where detected is None when no exercise has reps in its posture
+    """
+    detected_frames = max(int((~np.isnan(series[:, 0, 0])).sum()), 1)
+    scores = {}
+    for name, analysis in analyses.items():
+        posture_share = exercises[name]['posture_matches'](series).sum() / detected_frames
+        reps = len(analysis['rep_frames'])
+        scores[name] = {
+            'reps': reps,
+            'posture_share': round(float(posture_share), 3),
+            'score': round(float(reps * posture_share), 3) if posture_share >= MIN_POSTURE_SHARE else 0.0
+        }
+
+    best = max(scores, key=lambda name: (scores[name]['score'], scores[name]['posture_share']), default=None)
+    if best is None or scores[best]['score'] == 0:
+        return None, scores
+    return best, scores
+
+
+def analyse_all(input_path, render=None, exercises=EXERCISES, content_hash=None, use_cache=True,
+                analysis_fps=DEFAULT_ANALYSIS_FPS, output_profile='full', workers=1, profiler=None, progress=None):
+    """
+    Analyse one video as every registered exercise from a single pose estimation pass.
+    Every exercise gets its rep analysis, per-frame record and JSON summary; the exercise is classified,
+    and the overlay video is rendered for render (default the detected exercise, or the first one when
+    none is detected). Other overlays can be rendered later with process_upload, which finds the
+    landmarks of this pass in the cache.
+    Returns dict with the 'detected' exercise and the classification 'scores', per exercise 'results'
+    of 'reps', 'summary_path' and 'record_path', and the 'rendered' exercise and its 'video_path'.
+    The caller owns the files; they are removed if processing fails
+    """
+    started = datetime.now()
+    files = []
+
+    def temp_path(suffix):
+        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+        temp_file.close()
+        files.append(temp_file.name)
+        return temp_file.name
+
+    try:
+        series, video, cached = landmark_series(input_path, content_hash, use_cache, analysis_fps, workers,
+                                                profiler, progress)
+
+        with timed(profiler, 'rep_analysis'):
+            analyses = {name: analyze_landmarks(series, video, exercise['analyze_series'])
+                        for name, exercise in exercises.items()}
+            detected, scores = classify_exercise(series, analyses, exercises)
+        rendered = render or detected or next(iter(exercises))
+
+        video_path = temp_path('.mp4')
+        render_video(input_path, video_path, series, analyses[rendered]['frames'],
+                     exercises[rendered]['draw_frame'], output_profile, workers, profiler, progress)
+
+        results = {}
+        for name, analysis in analyses.items():
+            exercise = exercises[name]
+            summary_path, record_path = temp_path('.json'), temp_path('.bin')
+            with FrameRecordWriter(record_path, exercise) as record:
+                record.extend(video, analysis['frames'], series)
+
+            reps = summarize_reps(analysis, video)
+            result = {'frame_count': reps['frame_count'], 'reps': reps['reps'], 'landmarks_cached': cached}
+            write_summary(summary_path, build_summary(name, record, result, started,
+                                                      profiler if name == rendered else None,
+                                                      exercise['form_notes']))
+            results[name] = {'reps': reps['reps'], 'summary_path': summary_path, 'record_path': record_path}
+
+        return {
+            'detected': detected,
+            'scores': scores,
+            'results': results,
+            'rendered': rendered,
+            'video_path': video_path
+        }
+
+    except BaseException:
+        for path in files:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        raise
@@ -0,0 +1,144 @@
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+import mediapipe as mp
+import numpy as np
+
+mp_pose = mp.solutions.pose
+
+# Default pose model settings shared by the upload processors and the live trackers
+POSE_SETTINGS = {
+    'model_complexity': 1,
+    'min_detection_confidence': 0.5,
+    'min_tracking_confidence': 0.5
+}
+
+# Most Pose graphs kept per model settings. Checkouts beyond this wait until a graph is returned
+POOL_SIZE = 4
+
+# Seconds a checkout waits for a graph before giving up. Live sessions hold theirs while they run,
+# so without a limit a few open live pages would stall every upload job
+CHECKOUT_TIMEOUT = 30
+
+# Blank frame run through every new or reset graph, so the first real frame does not pay for
+# calculator setup. It contains no pose, which leaves the tracker without a region to follow
+WARMUP_FRAME = np.zeros((64, 64, 3), dtype=np.uint8)
+WARMUP_FRAME.flags.writeable = False
+
+
+class PoseEngineBusy(RuntimeError):
+    """Raised by PosePool.checkout when no graph became free in time"""
+
+
+def _settings_key(settings):
+    """Hashable pool key of a Pose settings dict"""
+    return tuple(sorted(settings.items()))
+
+
+class PosePool:
+    """
+    Pool of warmed-up MediaPipe Pose graphs shared by every session of the process, keyed by model settings.
+    checkout() hands a graph to one caller at a time and resets it when it comes back, so no tracking
+    state leaks from one video into the next. A graph whose user raised is closed instead of reused
+    """
+
+    def __init__(self, size=POOL_SIZE):
+        self.size = size
+        self._condition = threading.Condition()
+        self._idle = defaultdict(list)
+        self._created = defaultdict(int)
+
+    def _create(self, key):
+        """Build and warm up a new graph for a slot already counted in _created"""
+        try:
+            pose = mp_pose.Pose(**dict(key))
+            pose.process(WARMUP_FRAME)
+        except BaseException:
+            self._forget(key)
+            raise
+        return pose
+
+    def _forget(self, key):
+        """Free the slot of a graph that was closed or never built"""
+        with self._condition:
+            self._created[key] -= 1
+            self._condition.notify()
+
+    def _acquire(self, key, timeout):
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._idle[key] or self._created[key] < self.size, timeout):
+                raise PoseEngineBusy(f"All {self.size} pose engines are busy, please try again in a moment")
+            if self._idle[key]:
+                return self._idle[key].pop()
+            self._created[key] += 1
+        # Graph construction takes a while, other checkouts go ahead meanwhile
+        return self._create(key)
+
+    def _release(self, key, pose, healthy):
+        if healthy:
+            try:
+                pose.reset()
+                pose.process(WARMUP_FRAME)
+            except Exception:
+                healthy = False
+
+        if not healthy:
+            try:
+                pose.close()
+            finally:
+                self._forget(key)
+            return
+
+        with self._condition:
+            self._idle[key].append(pose)
+            self._condition.notify()
+
+    @contextmanager
+    def checkout(self, settings, timeout=CHECKOUT_TIMEOUT):
+        """
+        Borrow a warmed-up Pose graph built with the given settings for the duration of the block.
+        Raises PoseEngineBusy when none is free within timeout seconds (None waits for good)
+        """
+        key = _settings_key(settings)
+        pose = self._acquire(key, timeout)
+        healthy = False
+        try:
+            yield pose
+            healthy = True
+        except GeneratorExit:
+            # A generator holding the graph was closed early, e.g. a live session was stopped
+            healthy = True
+            raise
+        finally:
+            self._release(key, pose, healthy)
+
+    def warm(self, settings, count=1):
+        """Build up to count idle graphs ahead of time, so the first checkouts find one ready"""
+        key = _settings_key(settings)
+        with self._condition:
+            missing = min(count, self.size) - len(self._idle[key])
+            missing = max(0, min(missing, self.size - self._created[key]))
+            self._created[key] += missing
+
+        for _ in range(missing):
+            pose = self._create(key)
+            with self._condition:
+                self._idle[key].append(pose)
+                self._condition.notify()
+
+    def close(self):
+        """Close every idle graph to free its memory. Later checkouts build new ones"""
+        with self._condition:
+            idle = [(key, pose) for key, poses in self._idle.items() for pose in poses]
+            self._idle.clear()
+            for key, _ in idle:
+                self._created[key] -= 1
+            self._condition.notify_all()
+
+        for _, pose in idle:
+            pose.close()
+
+
+# The pool used by the upload processors and live trackers
+POSE_POOL = PosePool()
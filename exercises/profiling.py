@@ -0,0 +1,164 @@
+import json
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+
+# Upper edges in milliseconds of the per-stage wall time histogram buckets
+HISTOGRAM_EDGES_MS = [0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500]
+LATENCY_PERCENTILES = [50, 90, 95, 99]
+
+# Sample the resident set size every this many frames
+RSS_SAMPLE_FRAMES = 30
+
+# Callbacks called as callback(job_name, report) whenever a profiled job finishes
+PROFILE_HOOKS = []
+
+
+def add_profile_hook(callback):
+    """Register a callback that receives every finished job's profile report, e.g. to forward it to telemetry"""
+    PROFILE_HOOKS.append(callback)
+
+
+def remove_profile_hook(callback):
+    """Unregister a callback added with add_profile_hook"""
+    if callback in PROFILE_HOOKS:
+        PROFILE_HOOKS.remove(callback)
+
+
+def current_rss_mb():
+    """Current resident set size of the process in MB, None where /proc is not available"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * resource.getpagesize() / 2**20
+
+
+def peak_rss_mb():
+    """Peak resident set size of the process over its whole lifetime in MB"""
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20
+
+
+def timed(profiler, stage):
+    """Context manager timing one stage when a profiler is given, a no-op otherwise"""
+    return profiler.stage(stage) if profiler is not None else nullcontext()
+
+
+def _summarize(samples):
+    """Count, totals, percentiles and histogram of a list of durations in seconds"""
+    ms = np.asarray(samples, dtype=np.float64) * 1000
+    counts = np.bincount(np.searchsorted(HISTOGRAM_EDGES_MS, ms), minlength=len(HISTOGRAM_EDGES_MS) + 1)
+    labels = [f"<={edge}ms" for edge in HISTOGRAM_EDGES_MS] + [f">{HISTOGRAM_EDGES_MS[-1]}ms"]
+    summary = {
+        'count': len(ms),
+        'total_s': round(float(ms.sum()) / 1000, 4),
+        'mean_ms': round(float(ms.mean()), 3),
+        'max_ms': round(float(ms.max()), 3)
+    }
+    summary.update({f"p{p}_ms": round(float(np.percentile(ms, p)), 3) for p in LATENCY_PERCENTILES})
+    summary['histogram'] = {label: int(count) for label, count in zip(labels, counts) if count}
+    return summary
+
+
+class JobProfiler:
+    """
+    Opt-in instrumentation for one processing job.
+    Collects wall times per stage, per-frame latency from decode to encode, and tracemalloc/RSS peaks.
+    Stages may be recorded from several threads at once
+    """
+
+    def __init__(self, job_name, trace_memory=True):
+        self.job_name = job_name
+        self._lock = threading.Lock()
+        self._timings = defaultdict(list)
+        self._frame_starts = {}
+        self._frame_latencies = []
+        self._report = None
+
+        # Leave tracemalloc alone when someone else is already tracing
+        self._trace_memory = trace_memory and not tracemalloc.is_tracing()
+        if self._trace_memory:
+            tracemalloc.start()
+        self._rss_start = current_rss_mb()
+        self._rss_peak = self._rss_start
+        self._started = time.perf_counter()
+
+    def record(self, stage, seconds):
+        """Add one wall time sample to a stage"""
+        with self._lock:
+            self._timings[stage].append(seconds)
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block as one sample of a stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def frame_started(self, frame, started=None):
+        """Mark the moment a frame started decoding (started, a perf_counter value, defaults to now)"""
+        self._frame_starts[frame] = time.perf_counter() if started is None else started
+
+    def frame_finished(self, frame):
+        """Mark the moment a frame has been written, recording its end-to-end latency"""
+        start = self._frame_starts.pop(frame, None)
+        if start is not None:
+            with self._lock:
+                self._frame_latencies.append(time.perf_counter() - start)
+        if frame % RSS_SAMPLE_FRAMES == 0:
+            rss = current_rss_mb()
+            if rss is not None:
+                self._rss_peak = max(self._rss_peak or 0, rss)
+
+    def finish(self):
+        """Stop profiling, notify the registered hooks and return the report (only the first call does work)"""
+        if self._report is not None:
+            return self._report
+
+        memory = {
+            'rss_start_mb': self._rss_start and round(self._rss_start, 1),
+            'rss_peak_mb': self._rss_peak and round(max(self._rss_peak, current_rss_mb() or 0), 1),
+            'process_rss_peak_mb': round(peak_rss_mb(), 1)
+        }
+        if self._trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            memory['tracemalloc_peak_mb'] = round(peak / 2**20, 1)
+
+        with self._lock:
+            self._report = {
+                'job': self.job_name,
+                'wall_time_s': round(time.perf_counter() - self._started, 3),
+                'stages': {stage: _summarize(samples) for stage, samples in self._timings.items()},
+                'frame_latency': _summarize(self._frame_latencies) if self._frame_latencies else None,
+                'memory': memory
+            }
+
+        for callback in list(PROFILE_HOOKS):
+            callback(self.job_name, self._report)
+        return self._report
+
+
+def format_report(report):
+    """Lines of a JobProfiler report as a readable table followed by its JSON"""
+    lines = ["=== Performance Profile ===", f"Job: {report['job']}, wall time {report['wall_time_s']:.3f}s"]
+    for stage, summary in report['stages'].items():
+        lines.append(f"{stage:<20} n={summary['count']:<6} total={summary['total_s']:.3f}s "
+                     f"mean={summary['mean_ms']:.2f}ms p95={summary['p95_ms']:.2f}ms max={summary['max_ms']:.2f}ms")
+    latency = report['frame_latency']
+    if latency:
+        lines.append("Frame latency: " + ", ".join(f"p{p}={latency[f'p{p}_ms']:.1f}ms" for p in LATENCY_PERCENTILES))
+    lines.append("Memory: " + ", ".join(f"{key}={value}" for key, value in report['memory'].items()))
+    lines.append(f"Profile JSON: {json.dumps(report)}")
+    return lines
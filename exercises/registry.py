@@ -0,0 +1,46 @@
+import importlib
+import sys
+import time
+from functools import partial
+
+# Seconds the first import of every module loaded through load() took, by module name
+IMPORT_TIMES = {}
+
+
+def load(module_name, attribute):
+    """
+    Import a module of this package on first use and return one of its attributes, so cv2, mediapipe
+    and requests are only loaded once a page needs them. The first import of each module is timed
+    """
+    name = f"{__package__}.{module_name}"
+    loaded = name in sys.modules
+    started = time.perf_counter()
+    # import_module also waits for a module another thread is still importing
+    module = importlib.import_module(name)
+    if not loaded:
+        IMPORT_TIMES.setdefault(name, round(time.perf_counter() - started, 4))
+    return getattr(module, attribute)
+
+
+def exercise_specs():
+    """Specs of every registered exercise, specs.EXERCISE_SPECS. Cheap to load, it needs neither cv2 nor mediapipe"""
+    return load('specs', 'EXERCISE_SPECS')
+
+
+def registered_exercises():
+    """Compiled hooks of every registered exercise, rep_engine.EXERCISES"""
+    return load('rep_engine', 'EXERCISES')
+
+
+def live_frames(exercise_name):
+    """Live frame generator of an exercise, live_capture.live_exercise_frames(source), None for an unknown exercise"""
+    if exercise_name not in exercise_specs():
+        return None
+    return partial(load('live_capture', 'live_exercise_frames'), registered_exercises()[exercise_name])
+
+
+def upload_processor(exercise_name):
+    """Upload processor of an exercise, video_engine.process_upload bound to its hooks, None for an unknown exercise"""
+    if exercise_name not in exercise_specs():
+        return None
+    return partial(load('video_engine', 'process_upload'), registered_exercises()[exercise_name])
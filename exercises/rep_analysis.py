@@ -0,0 +1,89 @@
+import numpy as np
+
+# Band 0 means the frame does not trigger any transition (e.g. no pose detected)
+NO_BAND = 0
+
+
+def run_state_machine(bands, next_state, counts, initial_state=0):
+    """
+    Run a table-driven stage machine over a whole band series.
+
+    next_state[band][stage] is the stage after seeing band in stage, counts[band][stage] marks the
+    transitions that complete a rep. Every transition must be idempotent (seeing the same band twice
+    in a row changes nothing the second time), which lets consecutive frames in the same band be
+    collapsed into one step so the Python loop only runs once per band change.
+
+    Returns dict with per-frame 'stage' codes, per-frame 'counter' and the 'rep_frames' indices
+    """
+    bands = np.asarray(bands)
+    frame_count = len(bands)
+
+    # Collapse runs of the same band, ignoring frames that cannot trigger a transition
+    active = np.flatnonzero(bands != NO_BAND)
+    active_bands = bands[active]
+    run_starts = np.flatnonzero(np.r_[True, active_bands[1:] != active_bands[:-1]]) if len(active) else active
+    run_frames = active[run_starts]
+    run_bands = active_bands[run_starts]
+
+    run_stages = np.empty(len(run_bands), dtype=np.int8)
+    run_counts = np.zeros(len(run_bands), dtype=bool)
+    stage = initial_state
+    for i, band in enumerate(run_bands.tolist()):
+        run_counts[i] = counts[band][stage]
+        stage = next_state[band][stage]
+        run_stages[i] = stage
+
+    # Expand back to frames: every frame carries the stage of the last run started at or before it
+    run_index = np.searchsorted(run_frames, np.arange(frame_count), side='right') - 1
+    run_stages = np.r_[run_stages, initial_state].astype(np.int8)
+    stages = run_stages[np.where(run_index >= 0, run_index, -1)]
+
+    rep_frames = run_frames[run_counts]
+    rep_events = np.zeros(frame_count, dtype=np.int32)
+    rep_events[rep_frames] = 1
+
+    return {
+        'stage': stages,
+        'counter': np.cumsum(rep_events, dtype=np.int32),
+        'rep_frames': rep_frames
+    }
+
+
+def forward_fill(values, initial=0.0):
+    """Replace NaN entries with the last valid value before them, or initial at the start"""
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    last_valid = np.maximum.accumulate(np.where(valid, np.arange(len(values)), -1))
+    return np.where(last_valid >= 0, values[np.maximum(last_valid, 0)], initial)
+
+
+def stage_names(stages, names):
+    """Map stage codes to the display names used by the per-frame loop (None for no stage yet)"""
+    return np.array(names, dtype=object)[stages]
+
+
+def expand_to_frames(analysis, sampled, frame_count):
+    """
+    Map an analysis computed on sampled frames back to every frame.
+    Skipped frames hold the state of the last sample before them, as in the per-frame loop
+    """
+    held = np.searchsorted(sampled, np.arange(frame_count), side='right') - 1
+    return {
+        'frames': {key: values[held] for key, values in analysis['frames'].items()},
+        'rep_frames': sampled[analysis['rep_frames']]
+    }
+
+
+def summarize_reps(analysis, video):
+    """Build the rep summary (count, frames and timestamps) from an analysis and the video properties"""
+    rep_frames = analysis['rep_frames']
+    fps = video['fps'] or 1
+    return {
+        'frame_count': len(analysis['frames']['counter']),
+        'fps': video['fps'],
+        'reps': int(len(rep_frames)),
+        # Frame numbers are 1-based, as in the analysis report
+        'rep_frames': (rep_frames + 1).tolist(),
+        'rep_times': np.round((rep_frames + 1) / fps, 2).tolist()
+    }
+
@@ -0,0 +1,258 @@
+from functools import partial
+
+import numpy as np
+
+from .drawing import draw_pose_landmarks
+from .hud import HUD_STYLES, draw_hud, draw_text
+from .landmarks import batch_angles, batch_angles_x_axis
+from .rep_analysis import NO_BAND, run_state_machine, forward_fill, stage_names
+from .specs import EXERCISE_SPECS
+
+# Comparison of each bound key against its limit, as (limit side, inclusive)
+BOUND_KEYS = {'above': ('low', False), 'min': ('low', True), 'below': ('high', False), 'max': ('high', True)}
+
+
+def _band_bounds(bounds):
+    """(low, low inclusive, high, high inclusive) of a band from its 'above', 'min', 'below' and 'max' keys"""
+    low, low_inclusive, high, high_inclusive = -np.inf, False, np.inf, False
+    for key, limit in bounds.items():
+        if key not in BOUND_KEYS:
+            raise ValueError(f"Unknown band bound {key!r}")
+        side, inclusive = BOUND_KEYS[key]
+        if side == 'low':
+            low, low_inclusive = limit, inclusive
+        else:
+            high, high_inclusive = limit, inclusive
+    return low, low_inclusive, high, high_inclusive
+
+
+def _transition_tables(spec, band_codes, stage_codes):
+    """
+    Build the NEXT_STAGE and COUNTS_REP tables, indexed [band][stage], from a spec's transitions.
+    Raises ValueError for transitions run_state_machine cannot collapse, i.e. ones where seeing the
+    same band again would change the stage again or count another rep
+    """
+    stage_count = len(stage_codes)
+    next_stage = [list(range(stage_count)) for _ in range(len(band_codes) + 1)]
+    counts = [[False] * stage_count for _ in range(len(band_codes) + 1)]
+
+    # The first transition listed for a band and stage wins
+    assigned = set()
+    for band, from_stages, to_stage, completes_rep in spec['transitions']:
+        band_code = band_codes[band]
+        applies = range(stage_count) if from_stages is None else [stage_codes[stage] for stage in from_stages]
+        for stage_code in applies:
+            if (band_code, stage_code) not in assigned:
+                assigned.add((band_code, stage_code))
+                next_stage[band_code][stage_code] = stage_codes[to_stage]
+                counts[band_code][stage_code] = completes_rep
+
+    for band_code, row in enumerate(next_stage):
+        for stage_code, after in enumerate(row):
+            if row[after] != after or counts[band_code][after]:
+                raise ValueError(f"Transitions of {spec['name']} are not idempotent for band {band_code}")
+    return next_stage, counts
+
+
+def compile_exercise(spec):
+    """
+    Compile an exercise spec (see specs.py) into the hooks used by the video engine and the live trackers.
+    Returns dict with init_state, update_state, analyze_series, draw_frame and posture_matches, the record
+    layout ('stages', 'angles', 'joints') and the spec's name, title, form_notes and mirror_live
+    """
+    names = list(spec['angles'])
+    if spec['drive'] not in names:
+        raise ValueError(f"Drive angle {spec['drive']!r} of {spec['name']} is not one of its angles")
+
+    joints = {name: tuple(joints) for name, joints in spec['angles'].items()}
+    triplets = [name for name in names if len(joints[name]) == 3]
+    pairs = [name for name in names if len(joints[name]) == 2]
+
+    band_codes = {band: code for code, (band, _) in enumerate(spec['bands'], start=1)}
+    stages = [None] + list(spec['stages'])
+    stage_codes = {stage: code for code, stage in enumerate(stages)}
+    next_stage, counts = _transition_tables(spec, band_codes, stage_codes)
+
+    rules = []
+    for rule in spec['progress']:
+        low, high = rule['range']
+        start = rule.get('from', 0)
+        span = rule['to'] - start if 'to' in rule else None
+        rules.append((stage_codes[rule['stage']] if 'stage' in rule else None,
+                      band_codes[rule['band']] if 'band' in rule else None, start, span, low, high))
+
+    plan = {
+        'angles': names,
+        'drive': names.index(spec['drive']),
+        'triplets': np.array([joints[name] for name in triplets], dtype=np.intp).reshape(-1, 3),
+        'triplet_slots': np.array([names.index(name) for name in triplets], dtype=np.intp),
+        'pairs': np.array([joints[name] for name in pairs], dtype=np.intp).reshape(-1, 2),
+        'pair_slots': np.array([names.index(name) for name in pairs], dtype=np.intp),
+        'bands': [_band_bounds(bounds) for _, bounds in spec['bands']],
+        'stages': stages,
+        'stage_codes': stage_codes,
+        'next_stage': next_stage,
+        'counts': counts,
+        'rules': rules,
+        'whole_percent': spec['whole_percent'],
+        'hud': HUD_STYLES[spec['hud']],
+        'progress_bar': spec['progress_bar'],
+        'labels': spec['labels'],
+        'posture': [(np.array(joints, dtype=np.intp), _band_bounds(bounds)) for joints, bounds in spec['posture']]
+    }
+
+    return {
+        'name': spec['name'],
+        'title': spec['title'],
+        'init_state': partial(init_state, plan),
+        'update_state': partial(update_state, plan),
+        'analyze_series': partial(analyze_series, plan),
+        'draw_frame': partial(draw_frame, plan),
+        'posture_matches': partial(posture_matches, plan),
+        'stages': stages,
+        'angles': names,
+        'joints': sorted({joint for name in names for joint in joints[name]}),
+        'form_notes': spec['form_notes'],
+        'mirror_live': spec['mirror_live']
+    }
+
+
+def measure_angles(plan, landmarks):
+    """All angles of an exercise for a (33, 4) frame or an (N, 33, 4) series, shape (K,) or (N, K)"""
+    angles = np.empty(landmarks.shape[:-2] + (len(plan['angles']),), dtype=np.result_type(landmarks, np.float32))
+    if len(plan['triplets']):
+        angles[..., plan['triplet_slots']] = batch_angles(landmarks, plan['triplets'])
+    if len(plan['pairs']):
+        angles[..., plan['pair_slots']] = batch_angles_x_axis(landmarks, plan['pairs'])
+    return angles
+
+
+def _inside(values, bounds):
+    low, low_inclusive, high, high_inclusive = bounds
+    return ((values >= low) if low_inclusive else (values > low)) & ((values <= high) if high_inclusive else (values < high))
+
+
+def classify_bands(plan, drive):
+    """Band code of every drive angle, NO_BAND outside all bands or where the angle is NaN"""
+    bands = np.full(np.shape(drive), NO_BAND, dtype=np.int8)
+    for code, bounds in enumerate(plan['bands'], start=1):
+        bands[_inside(drive, bounds) & (bands == NO_BAND)] = code
+    return bands
+
+
+def posture_matches(plan, series):
+    """Per frame of an (N, 33, 4) series, whether the body is in the exercise's posture (False without a pose)"""
+    matches = ~np.isnan(series[:, 0, 0])
+    for joints, bounds in plan['posture']:
+        if len(joints) == 3:
+            angle = batch_angles(series, joints)[:, 0]
+        else:
+            line = batch_angles_x_axis(series, joints)[:, 0]
+            angle = np.minimum(line, 180 - line)
+        matches &= _inside(angle, bounds)
+    return matches
+
+
+def _scale_progress(rule, drive):
+    _, _, start, span, low, high = rule
+    value = (drive - start) / span * (high - low) if span else drive * 0
+    return low, high, value
+
+
+def _band_of(plan, angle):
+    """Scalar classify_bands for the per-frame kernel"""
+    for code, (low, low_inclusive, high, high_inclusive) in enumerate(plan['bands'], start=1):
+        if (angle >= low if low_inclusive else angle > low) and (angle <= high if high_inclusive else angle < high):
+            return code
+    return NO_BAND
+
+
+def init_state(plan):
+    """Initial rep counting state: no reps, no stage, no progress and no angles yet"""
+    state = {'counter': 0, 'stage': None, 'progress_percentage': 0}
+    state.update((name, np.nan) for name in plan['angles'])
+    return state
+
+
+def update_state(plan, state, landmarks, frame_count):
+    """Per-frame kernel: update the rep count, stage, progress and angles from one frame's (33, 4) landmarks"""
+    for name in plan['angles']:
+        state[name] = np.nan
+    if landmarks is None:
+        return
+
+    angles = measure_angles(plan, landmarks)
+    for name, angle in zip(plan['angles'], angles):
+        state[name] = angle
+    drive = angles[plan['drive']]
+    if np.isnan(drive):
+        return
+
+    band = _band_of(plan, drive)
+    stage = plan['stage_codes'][state['stage']]
+    if plan['counts'][band][stage]:
+        state['counter'] += 1
+    stage = plan['next_stage'][band][stage]
+    state['stage'] = plan['stages'][stage]
+
+    for rule in plan['rules']:
+        if rule[0] not in (None, stage) or rule[1] not in (None, band):
+            continue
+        low, high, value = _scale_progress(rule, drive)
+        if plan['whole_percent']:
+            state['progress_percentage'] = int(min(max(low + np.floor(value), low), high))
+        else:
+            state['progress_percentage'] = min(max(low + value, low), high)
+        break
+
+
+def analyze_series(plan, series):
+    """Vectorized rep analysis over an (N, 33, 4) landmark series, the same results as update_state per frame"""
+    angles = measure_angles(plan, series)
+    drive = angles[:, plan['drive']]
+
+    bands = classify_bands(plan, drive)
+    reps = run_state_machine(bands, plan['next_stage'], plan['counts'])
+    stages = reps['stage']
+
+    progress = np.full(len(drive), np.nan)
+    assigned = np.isnan(drive)
+    for rule in plan['rules']:
+        matches = ~assigned
+        if rule[0] is not None:
+            matches &= stages == rule[0]
+        if rule[1] is not None:
+            matches &= bands == rule[1]
+        low, high, value = _scale_progress(rule, drive[matches])
+        if plan['whole_percent']:
+            value = np.floor(value)
+        progress[matches] = np.clip(low + value, low, high)
+        assigned |= matches
+
+    progress = forward_fill(progress)
+    frames = {
+        'counter': reps['counter'],
+        'stage': stage_names(stages, plan['stages']),
+        'progress_percentage': progress.astype(int) if plan['whole_percent'] else progress
+    }
+    frames.update((name, angles[:, slot]) for slot, name in enumerate(plan['angles']))
+    return {'frames': frames, 'rep_frames': reps['rep_frames']}
+
+
+def draw_frame(plan, image, landmarks, frame_state):
+    """Draw the angle labels, stats panel, progress bar and pose skeleton on one frame"""
+    if landmarks is not None and plan['labels']:
+        frame_height, frame_width = image.shape[:2]
+        for text, angle, joint in plan['labels']:
+            if not np.isnan(frame_state[angle]):
+                org = tuple(np.multiply(landmarks[joint, :2], [frame_width, frame_height]).astype(int))
+                draw_text(image, f"{text}: {int(frame_state[angle])}", org, 0.5, 2)
+
+    draw_hud(image, plan['hud'], plan['progress_bar'], frame_state['counter'], frame_state['stage'],
+             frame_state['progress_percentage'])
+
+    draw_pose_landmarks(image, landmarks)
+
+
+# Compiled hooks of every registered exercise
+EXERCISES = {name: compile_exercise(spec) for name, spec in EXERCISE_SPECS.items()}
@@ -0,0 +1,142 @@
+from .landmarks import (LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST, LEFT_HIP, LEFT_KNEE, LEFT_ANKLE)
+
+# Exercises as data, compiled by rep_engine.compile_exercise. A spec has:
+#   angles       name -> (a, b, c) for the joint angle at b, or (a, b) for the line from b to a against the x-axis
+#   drive        the angle whose bands drive the stage machine
+#   bands        (name, bounds) in order, bounds using 'above' (>), 'min' (>=), 'below' (<) and 'max' (<=)
+#   stages       stage names, the stage before the first transition is None
+#   transitions  (band, stages it applies in or None for any, next stage, completes a rep)
+#   progress     rules tried in order on every frame with a pose: the rule's 'stage' and 'band' (when given)
+#                must match, and the drive angle is mapped linearly 'from' -> 'to' onto 'range' and clipped to it.
+#                Frames no rule matches keep the previous progress
+#   whole_percent  truncate the progress to whole percent
+#   hud (a style name of hud.HUD_STYLES), progress_bar, labels (text, angle, joint the label is drawn at)
+#   and form_notes for the report, mirror_live flips live frames horizontally
+#   image, instructions (heading, camera note, steps) and demo (Drive url and pinned sha256 of the
+#                source, see demo_assets) for the app's exercise pages
+#   posture      (joints, bounds) the body holds while doing the exercise, used to tell exercises apart:
+#                (a, b, c) is the joint angle at b, (a, b) the incline of the line from b to a above horizontal (0-90)
+
+PUSHUP = {
+    'name': 'pushup',
+    'title': 'Push-ups',
+    'angles': {'elbow_angle': (LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST)},
+    'drive': 'elbow_angle',
+    'bands': [('extended', {'above': 160}), ('bent', {'below': 30})],
+    'stages': ['down', 'up'],
+    'transitions': [
+        ('extended', None, 'down', False),
+        ('bent', ['down'], 'up', True)
+    ],
+    'progress': [{'from': 160, 'to': 30, 'range': (0, 100)}],
+    'whole_percent': False,
+    'hud': 'compact',
+    'progress_bar': {'x': 30, 'y_start': 80, 'height': 200, 'width': 10},
+    'labels': [],
+    'form_notes': [],
+    'mirror_live': False,
+    # Body horizontal
+    'posture': [((LEFT_SHOULDER, LEFT_HIP), {'below': 45})],
+    'image': "https://raw.githubusercontent.com/Aman-Kaushik-20/A_GYM_ASSISTANT/main/Pushup_04.jpeg",
+    'instructions': {
+        'heading': "Push-up Instructions:",
+        'camera_note': ("Position yourself so your left side faces the camera. "
+                        "Ensure your full body is visible and only one person is in frame."),
+        'steps': [
+            "Start in a plank position with hands shoulder-width apart",
+            "Keep your core tight and back straight",
+            "Lower your body until chest nearly touches the ground",
+            "Push back up to starting position",
+            "Maintain proper form throughout the movement"
+        ]
+    },
+    'demo': {'url': 'https://drive.google.com/file/d/1zN0eRLrj_urOaMxgFujO5UYrzxpsZqnT/view?usp=sharing',
+             'sha256': None}
+}
+
+BICEP = {
+    'name': 'bicep',
+    'title': 'Bicep Curls',
+    'angles': {'elbow_angle': (LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST)},
+    'drive': 'elbow_angle',
+    'bands': [('extended', {'above': 140}), ('curled', {'below': 40})],
+    'stages': ['down', 'up'],
+    'transitions': [
+        ('extended', None, 'down', False),
+        ('curled', ['down'], 'up', True)
+    ],
+    'progress': [{'from': 140, 'to': 40, 'range': (0, 100)}],
+    'whole_percent': False,
+    'hud': 'compact',
+    'progress_bar': {'x': 30, 'y_start': 80, 'height': 200, 'width': 10},
+    'labels': [],
+    'form_notes': ["Proper bicep curl range: 40° to 140°"],
+    'mirror_live': True,
+    # Standing upright, hips straight
+    'posture': [((LEFT_SHOULDER, LEFT_HIP), {'min': 45}), ((LEFT_SHOULDER, LEFT_HIP, LEFT_KNEE), {'min': 150})],
+    'image': "https://raw.githubusercontent.com/Aman-Kaushik-20/A_GYM_ASSISTANT/main/bicep_04.jpeg",
+    'instructions': {
+        'heading': "Bicep Curl Instructions:",
+        'camera_note': ("Position yourself so your left arm is visible to  the camera. "
+                        "Ensure your full body is visible and only one person is in frame."),
+        'steps': [
+            "Stand with feet shoulder-width apart",
+            "Hold dumbbells at your sides",
+            "Keep elbows close to your body",
+            "Curl weights up towards shoulders",
+            "Lower weights back down with control"
+        ]
+    },
+    'demo': {'url': 'https://drive.google.com/file/d/1HXuRYvn0bIsuXw3a-_RPEGWe9XZn97mf/view?usp=sharing',
+             'sha256': None}
+}
+
+DEADLIFT = {
+    'name': 'deadlift',
+    'title': 'Deadlifts',
+    'angles': {
+        'hip_angle': (LEFT_SHOULDER, LEFT_HIP, LEFT_KNEE),
+        'knee_angle': (LEFT_HIP, LEFT_KNEE, LEFT_ANKLE),
+        'back_angle': (LEFT_SHOULDER, LEFT_HIP)
+    },
+    'drive': 'hip_angle',
+    'bands': [('bent', {'below': 150}), ('rising', {'min': 150, 'below': 160}), ('locked', {'min': 160, 'max': 180})],
+    'stages': ['Down', 'Up', 'Lockout'],
+    'transitions': [
+        ('bent', None, 'Down', False),
+        ('rising', ['Down', 'Lockout'], 'Up', False),
+        ('locked', ['Up'], 'Lockout', True)
+    ],
+    'progress': [
+        {'stage': 'Down', 'band': 'bent', 'range': (0, 0)},
+        {'stage': 'Up', 'band': 'rising', 'from': 150, 'to': 160, 'range': (0, 50)},
+        {'stage': 'Lockout', 'band': 'locked', 'from': 160, 'to': 180, 'range': (50, 100)}
+    ],
+    'whole_percent': True,
+    'hud': 'large',
+    'progress_bar': {'x': 50, 'y_start': 150, 'height': 400, 'width': 20},
+    'labels': [('Hip', 'hip_angle', LEFT_HIP), ('Knee', 'knee_angle', LEFT_KNEE), ('Back', 'back_angle', LEFT_SHOULDER)],
+    'form_notes': [],
+    'mirror_live': False,
+    # Standing on the legs, the torso may hinge forward
+    'posture': [((LEFT_HIP, LEFT_ANKLE), {'min': 45})],
+    'image': "https://raw.githubusercontent.com/Aman-Kaushik-20/A_GYM_ASSISTANT/main/deadlift_02.jpeg",
+    'instructions': {
+        'heading': "Deadlift Instructions:",
+        'camera_note': ("Position yourself so your left side faces the camera. "
+                        "Ensure your full body is visible and only one person is in frame."),
+        'steps': [
+            "Stand with feet hip-width apart",
+            "Bend at hips and knees to grasp the bar",
+            "Keep back straight and chest up",
+            "Push through heels to lift the bar",
+            "Return to starting position with controlled movement"
+        ]
+    },
+    'demo': {'url': 'https://drive.google.com/file/d/1o9xksuVOEAmiTjAaQ-K69PdJNOE8ZN1R/view?usp=sharing',
+             'sha256': None}
+}
+
+# Registered exercises by name, in the order the app lists them. Adding a spec here is all a new exercise needs:
+# the rep engine, the upload and live pipelines, the exercise detection and the app's pages all read this registry
+EXERCISE_SPECS = {spec['name']: spec for spec in (PUSHUP, DEADLIFT, BICEP)}
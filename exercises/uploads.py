@@ -0,0 +1,68 @@
+import hashlib
+import os
+import tempfile
+
+from .landmark_cache import HASH_CHUNK_SIZE
+from .video_engine import open_video
+
+# Uploads over these limits are rejected before any processing starts.
+# server.maxUploadSize in .streamlit/config.toml must be at least MAX_UPLOAD_MB
+MAX_UPLOAD_MB = 1024
+MAX_UPLOAD_SECONDS = 15 * 60
+
+# Size of the chunks copied from the upload to disk
+SPOOL_CHUNK_SIZE = HASH_CHUNK_SIZE
+
+
+class UploadRejected(ValueError):
+    """Raised when an upload is over the size or duration limit or is not a readable video"""
+
+
+def spool_upload(uploaded_file, suffix='.mp4', max_mb=MAX_UPLOAD_MB):
+    """
+    Copy an uploaded file-like object to a temporary file in fixed-size chunks, hashing it on the way,
+    so the video is never held in memory a second time. Uploads over max_mb are rejected as soon as
+    their size is known, before or while copying.
+    Returns tuple of (path, content_hash) where content_hash is the SHA-256 used as landmark cache key
+    """
+    max_bytes = max_mb * 1024 * 1024
+    size = getattr(uploaded_file, 'size', None)
+    if size is not None and size > max_bytes:
+        raise UploadRejected(f"The video is {size / 2**20:.0f} MB, uploads are limited to {max_mb} MB")
+
+    if hasattr(uploaded_file, 'seek'):
+        uploaded_file.seek(0)
+
+    digest = hashlib.sha256()
+    written = 0
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_input:
+        try:
+            for chunk in iter(lambda: uploaded_file.read(SPOOL_CHUNK_SIZE), b''):
+                written += len(chunk)
+                if written > max_bytes:
+                    raise UploadRejected(f"The video is larger than the {max_mb} MB upload limit")
+                digest.update(chunk)
+                temp_input.write(chunk)
+        except BaseException:
+            temp_input.close()
+            os.unlink(temp_input.name)
+            raise
+
+    return temp_input.name, digest.hexdigest()
+
+
+def check_duration(input_path, max_seconds=MAX_UPLOAD_SECONDS):
+    """
+    Reject a spooled video that cannot be opened or runs longer than max_seconds, reading only its header.
+    Returns the video properties from open_video
+    """
+    try:
+        cap, video = open_video(input_path)
+    except ValueError:
+        raise UploadRejected("The uploaded file could not be read as a video")
+    cap.release()
+
+    if video['fps'] and video['frame_count'] / video['fps'] > max_seconds:
+        raise UploadRejected(f"The video is {video['frame_count'] / video['fps'] / 60:.1f} minutes long, "
+                             f"uploads are limited to {max_seconds / 60:.0f} minutes")
+    return video
@@ -0,0 +1,755 @@
+import multiprocessing
+import os
+import queue
+import tempfile
+import threading
+import time
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from .analysis_record import FrameRecordWriter, build_summary, write_summary
+from .landmark_cache import hash_file, cache_key, load_landmarks, save_landmarks
+from .landmarks import (landmarks_to_array, frame_landmarks, empty_series, sample_frames,
+                        interpolate_series, interpolate_landmarks)
+from .pose_pool import POSE_POOL, POSE_SETTINGS
+from .profiling import timed
+from .rep_analysis import summarize_reps, expand_to_frames
+from .video_io import DEFAULT_FPS, open_video_writer, release_writer, ffmpeg_available, concat_videos
+
+mp_pose = mp.solutions.pose
+
+# Number of frames each stage may run ahead of the next one
+QUEUE_SIZE = 8
+
+# Longest side of the frames passed to pose estimation. MediaPipe works on a 256x256 input internally,
+# so larger frames only add color conversion and copy cost. Landmarks are normalized, so they map
+# straight back onto the full-resolution frame
+INFERENCE_MAX_SIDE = 640
+
+# Longest side of the rendered output video for each output profile (None keeps the source resolution)
+OUTPUT_PROFILES = {
+    'full': None,
+    'preview': 854
+}
+
+# Pose sampling rate for uploaded videos. Footage above this rate only runs pose estimation on every
+# stride-th frame (60 fps -> every 3rd frame), slower footage is analysed frame by frame
+DEFAULT_ANALYSIS_FPS = 20
+
+# Segment-parallel processing: a video is only split when every worker gets at least
+# SEGMENT_MIN_SECONDS of footage, and each segment's tracker warms up on the
+# SEGMENT_OVERLAP_SECONDS before it
+SEGMENT_MIN_SECONDS = 20
+SEGMENT_OVERLAP_SECONDS = 2
+
+_END = object()
+
+
+def open_video(input_path):
+    """
+    Open a video file for reading.
+    Returns tuple of (capture, properties) where properties holds width, height, fps and frame_count
+    """
+    cap = cv2.VideoCapture(input_path)
+
+    if not cap.isOpened():
+        raise ValueError(f"Error: Could not open video file at {input_path}")
+
+    properties = {
+        'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        'fps': int(cap.get(cv2.CAP_PROP_FPS)),
+        'frame_count': int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    }
+    return cap, properties
+
+
+def fit_size(width, height, max_side):
+    """
+    Size (width, height) that fits within max_side while keeping the aspect ratio, rounded to even
+    values for the encoder. Returns None when the frame already fits
+    """
+    if not max_side or max(width, height) <= max_side:
+        return None
+    scale = max_side / max(width, height)
+    return max(2, int(width * scale) // 2 * 2), max(2, int(height * scale) // 2 * 2)
+
+
+def analysis_stride(fps, analysis_fps):
+    """Number of frames per pose sample needed to analyse at roughly analysis_fps"""
+    if not analysis_fps or not fps:
+        return 1
+    return max(1, int(fps // analysis_fps))
+
+
+def plan_segments(frame_count, fps, workers, stride=1):
+    """
+    Split a video into up to workers consecutive segments for parallel processing.
+    Segment starts are aligned to the stride so every segment samples the same frames as a sequential run.
+    Returns list of (warm_start, start, end) frame ranges, end being None for the last segment
+    """
+    fps = fps or DEFAULT_FPS
+    count = max(1, min(workers, frame_count // (SEGMENT_MIN_SECONDS * fps)))
+    if count == 1:
+        return [(0, 0, None)]
+
+    length = -(-frame_count // count)
+    length = -(-length // stride) * stride
+    overlap = SEGMENT_OVERLAP_SECONDS * fps
+
+    starts = list(range(0, frame_count, length))
+    ends = starts[1:] + [None]
+    return [(max(0, start - overlap), start, end) for start, end in zip(starts, ends)]
+
+
+def _process_pool(workers):
+    """Process pool for segment workers; spawned so no threads or graph state leak in through fork"""
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+
+def _seek(cap, frame):
+    """
+    Move a capture to a frame. Returns False when it reports another position afterwards, as seeks
+    snapping to a keyframe or landing off by some frames in variable frame rate files do
+    """
+    if frame:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, frame)
+    return int(cap.get(cv2.CAP_PROP_POS_FRAMES)) == frame
+
+
+def _put(q, item, stop_event):
+    """Put an item on a bounded queue without blocking forever once the pipeline is stopping"""
+    while not stop_event.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q, stop_event):
+    """Get an item from a queue, returning _END once the pipeline is stopping"""
+    while not stop_event.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return _END
+
+
+def _decode_stage(cap, frames_out, stop_event, errors, stride=1, resize_to=None, profiler=None, track_latency=False):
+    """
+    Read frames from the capture and hand them to the pose stage.
+    With stride > 1 only every stride-th frame is decoded; the others are skipped with grab()
+    and handed on as None so the frame numbering stays intact. resize_to downscales every
+    decoded frame once, before anything else touches it. track_latency marks when each frame
+    starts for the profiler's latency stats, for pipelines whose last stage calls frame_finished
+    """
+    try:
+        frame_count = 0
+        while cap.isOpened():
+            started = time.perf_counter()
+            with timed(profiler, 'decode'):
+                if frame_count % stride:
+                    ret, frame = cap.grab(), None
+                else:
+                    ret, frame = cap.read()
+
+            if not ret:
+                break
+            if profiler is not None and track_latency:
+                profiler.frame_started(frame_count + 1, started)
+
+            if resize_to is not None and frame is not None:
+                with timed(profiler, 'resize'):
+                    frame = cv2.resize(frame, resize_to, interpolation=cv2.INTER_AREA)
+
+            frame_count += 1
+            if not _put(frames_out, (frame_count, frame), stop_event):
+                return
+    except Exception as e:
+        errors.append(e)
+        stop_event.set()
+    finally:
+        _put(frames_out, _END, stop_event)
+
+
+def _render_stage(rendered_in, out, draw_fn, stop_event, errors, profiler=None):
+    """Draw the overlay on each analysed frame and write it to the output video"""
+    try:
+        while True:
+            item = _get(rendered_in, stop_event)
+
+            if item is _END:
+                break
+
+            frame_count, image, landmarks, frame_state = item
+            with timed(profiler, 'draw'):
+                draw_fn(image, landmarks, frame_state)
+            with timed(profiler, 'encode'):
+                out.write(image)
+            if profiler is not None:
+                profiler.frame_finished(frame_count)
+    except Exception as e:
+        errors.append(e)
+        stop_event.set()
+
+
+def _detect(pose, frame, inference_size=None, profiler=None):
+    """
+    Run pose estimation on one BGR frame and return its (33, 4) landmarks or None.
+    The frame is downscaled to inference_size first, before the color conversion
+    """
+    with timed(profiler, 'color_conversion'):
+        if inference_size is not None:
+            frame = cv2.resize(frame, inference_size, interpolation=cv2.INTER_AREA)
+        image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        image.flags.writeable = False
+    with timed(profiler, 'pose'):
+        results = pose.process(image)
+    return landmarks_to_array(results.pose_landmarks)
+
+
+def run_pipeline(input_path, output_path, state, update_fn, draw_fn, record=None, analysis_fps=None,
+                 output_profile='full', profiler=None, progress=None):
+    """
+    Run decode, pose estimation and render/encode as three overlapping stages.
+
+    update_fn(state, landmarks, frame_count) updates the exercise state in place for one frame,
+    landmarks being a (33, 4) array from landmarks_to_array or None when no pose was detected.
+    draw_fn(image, landmarks, frame_state) draws the overlay for one frame from a snapshot of that state.
+    A FrameRecordWriter passed as record gets the row of every frame as it is drawn.
+
+    With analysis_fps set, pose estimation and update_fn only run on sampled frames. Frames in between
+    are held back until the next sample, drawn with interpolated landmarks and the state of the
+    previous sample.
+
+    output_profile picks the output resolution from OUTPUT_PROFILES; pose estimation always runs on
+    frames of at most INFERENCE_MAX_SIDE. A JobProfiler passed as profiler records every stage.
+    progress(stage, frames_done, frame_count) is called after every pose sample; an exception it raises
+    stops the pipeline.
+
+    Returns tuple of (state, series, video) where series holds the landmarks of every frame
+    and video the properties from open_video, including the 'stride' used
+    """
+    cap, video = open_video(input_path)
+    stride = video['stride'] = analysis_stride(video['fps'], analysis_fps)
+    if record is not None:
+        record.begin(video)
+
+    output_size = fit_size(video['width'], video['height'], OUTPUT_PROFILES[output_profile])
+    frame_size = output_size or (video['width'], video['height'])
+    inference_size = fit_size(*frame_size, INFERENCE_MAX_SIDE)
+
+    # Encode straight to browser-playable H.264
+    out = open_video_writer(output_path, video['fps'], frame_size)
+
+    frames = queue.Queue(maxsize=QUEUE_SIZE)
+    rendered = queue.Queue(maxsize=QUEUE_SIZE + stride)
+    stop_event = threading.Event()
+    errors = []
+
+    decoder = threading.Thread(target=_decode_stage,
+                               args=(cap, frames, stop_event, errors, 1, output_size, profiler, True), daemon=True)
+    renderer = threading.Thread(target=_render_stage, args=(rendered, out, draw_fn, stop_event, errors, profiler),
+                                daemon=True)
+
+    missing = empty_series(1)[0]
+    series = []
+
+    def emit(frame_count, frame, landmarks, frame_state):
+        series.append(missing if landmarks is None else landmarks)
+        if record is not None:
+            record.append(frame_count, landmarks, frame_state)
+        return _put(rendered, (frame_count, frame, landmarks, frame_state), stop_event)
+
+    # Frames decoded since the last pose sample, and that sample's landmarks and state
+    pending = []
+    previous_landmarks, previous_state = None, dict(state)
+    failed = False
+    try:
+        decoder.start()
+        renderer.start()
+
+        # Pose estimation runs on the calling thread, which has the pooled graph to itself
+        with POSE_POOL.checkout(POSE_SETTINGS) as pose:
+            while True:
+                item = _get(frames, stop_event)
+
+                if item is _END:
+                    break
+
+                frame_count, frame = item
+
+                if (frame_count - 1) % stride:
+                    pending.append((frame_count, frame))
+                    continue
+
+                landmarks = _detect(pose, frame, inference_size, profiler)
+
+                for offset, (pending_count, pending_frame) in enumerate(pending, start=1):
+                    between = interpolate_landmarks(previous_landmarks, landmarks, offset / stride)
+                    emit(pending_count, pending_frame, between, previous_state)
+                pending = []
+
+                with timed(profiler, 'analysis'):
+                    update_fn(state, landmarks, frame_count)
+                previous_landmarks, previous_state = landmarks, dict(state)
+
+                # The decoded BGR frame is untouched by inference, so it is drawn on directly
+                if not emit(frame_count, frame, landmarks, previous_state):
+                    break
+
+                if progress is not None:
+                    progress('processing', frame_count, video['frame_count'])
+
+        # Frames after the last sample keep its landmarks
+        for pending_count, pending_frame in pending:
+            emit(pending_count, pending_frame, previous_landmarks, previous_state)
+
+        _put(rendered, _END, stop_event)
+    except BaseException:
+        failed = True
+        stop_event.set()
+        raise
+    finally:
+        decoder.join()
+        renderer.join()
+        cap.release()
+        with timed(profiler, 'encode_flush'):
+            # An error of this block or of a stage thread is the one to report, not ffmpeg's
+            release_writer(out, suppress_errors=failed or bool(errors))
+
+    if errors:
+        raise errors[0]
+
+    series = np.stack(series) if series else empty_series(0)
+    return state, series, video
+
+
+def _extract_segment(input_path, warm_start, start, end, stride, inference_max_side):
+    """
+    Segment worker: run pose estimation on frames [start, end) of a video with its own Pose graph.
+    The tracker warms up on frames [warm_start, start), whose landmarks are discarded.
+    Returns tuple of (sampled_frame_indices, samples, frames_read_until), or None when the seek to
+    warm_start missed
+    """
+    cap, video = open_video(input_path)
+    inference_size = fit_size(video['width'], video['height'], inference_max_side)
+    if not _seek(cap, warm_start):
+        cap.release()
+        return None
+
+    missing = empty_series(1)[0]
+    indices, samples = [], []
+    index = warm_start
+    try:
+        # Worker processes only live for one job, so they build their graph instead of using the pool
+        with mp_pose.Pose(**POSE_SETTINGS) as pose:
+            while end is None or index < end:
+                # Sample on the same global grid as a sequential run
+                if index % stride:
+                    ret, frame = cap.grab(), None
+                else:
+                    ret, frame = cap.read()
+
+                if not ret:
+                    break
+
+                if frame is not None:
+                    landmarks = _detect(pose, frame, inference_size)
+                    if index >= start:
+                        indices.append(index)
+                        samples.append(missing if landmarks is None else landmarks)
+                index += 1
+    finally:
+        cap.release()
+
+    return np.array(indices, dtype=np.intp), np.stack(samples) if samples else empty_series(0), index
+
+
+def _extract_segments(input_path, video, segments, progress=None):
+    """
+    Run _extract_segment for every segment in a process pool and merge the results into one series.
+    progress is called once per finished segment. Returns None when a segment could not seek to its
+    frames or read all of them, so the samples would not line up with the frames
+    """
+    with _process_pool(len(segments)) as pool:
+        futures = [pool.submit(_extract_segment, input_path, *segment, video['stride'], INFERENCE_MAX_SIDE)
+                   for segment in segments]
+        results = []
+        try:
+            for future in futures:
+                results.append(future.result())
+                if results[-1] is None:
+                    return None
+                if progress is not None:
+                    progress('landmarks', results[-1][2], video['frame_count'])
+        finally:
+            # On an error or a misaligned segment, segments that have not started yet are dropped and
+            # running ones finish before the pool closes
+            for future in futures:
+                future.cancel()
+
+    sampled = np.concatenate([indices for indices, _, _ in results])
+    samples = np.concatenate([segment_samples for _, segment_samples, _ in results])
+    frame_count = results[-1][2]
+    if not np.array_equal(sampled, sample_frames(frame_count, video['stride'])):
+        return None
+
+    if not len(samples):
+        return empty_series(0)
+    if video['stride'] == 1:
+        return samples
+    return interpolate_series(samples, sampled, frame_count)
+
+
+def extract_landmarks(input_path, analysis_fps=None, workers=1, profiler=None, progress=None):
+    """
+    First pass of the two-pass analysis: run pose estimation only, without drawing or encoding.
+    With analysis_fps set, skipped frames are only grabbed (never decoded to pixels) and their
+    landmarks are interpolated. With workers > 1 long videos are split into segments that are
+    analysed in parallel worker processes (see plan_segments). progress(stage, frames_done, frame_count)
+    is called as frames are analysed; an exception it raises stops the extraction.
+    Returns tuple of (series, properties) where series is an (N, 33, 4) float32 array, NaN for frames without a pose
+    """
+    cap, video = open_video(input_path)
+    stride = video['stride'] = analysis_stride(video['fps'], analysis_fps)
+
+    segments = plan_segments(video['frame_count'], video['fps'], workers, stride)
+    if len(segments) > 1:
+        cap.release()
+        # Stages inside the worker processes are not profiled, only the parallel step as a whole
+        with timed(profiler, 'extract_segments'):
+            series = _extract_segments(input_path, video, segments, progress)
+        if series is not None:
+            return series, video
+        # The segments did not line up with the frames, so the video is analysed in one pass instead
+        cap, _ = open_video(input_path)
+
+    inference_size = fit_size(video['width'], video['height'], INFERENCE_MAX_SIDE)
+
+    frames = queue.Queue(maxsize=QUEUE_SIZE)
+    stop_event = threading.Event()
+    errors = []
+    decoder = threading.Thread(target=_decode_stage,
+                               args=(cap, frames, stop_event, errors, stride, inference_size, profiler), daemon=True)
+
+    missing = empty_series(1)[0]
+    samples = []
+    frame_count = 0
+    try:
+        decoder.start()
+
+        with POSE_POOL.checkout(POSE_SETTINGS) as pose:
+            while True:
+                item = _get(frames, stop_event)
+
+                if item is _END:
+                    break
+
+                frame_count, frame = item
+                if frame is None:
+                    continue
+
+                # Frames were already downscaled to the inference size by the decoder
+                landmarks = _detect(pose, frame, profiler=profiler)
+                samples.append(missing if landmarks is None else landmarks)
+
+                if progress is not None:
+                    progress('landmarks', frame_count, video['frame_count'])
+    except BaseException:
+        stop_event.set()
+        raise
+    finally:
+        decoder.join()
+        cap.release()
+
+    if errors:
+        raise errors[0]
+
+    if not samples:
+        return empty_series(0), video
+
+    samples = np.stack(samples)
+    if stride == 1:
+        return samples, video
+    with timed(profiler, 'interpolate'):
+        return interpolate_series(samples, sample_frames(frame_count, stride), frame_count), video
+
+
+def _render_segment(input_path, output_path, start, series, frames, draw_fn, output_profile):
+    """
+    Segment worker: draw and encode the len(series) frames starting at frame start.
+    Returns False when the seek to start missed or the video ended early, leaving the part misaligned
+    """
+    cap, video = open_video(input_path)
+    if not _seek(cap, start):
+        cap.release()
+        return False
+
+    output_size = fit_size(video['width'], video['height'], OUTPUT_PROFILES[output_profile])
+    out = open_video_writer(output_path, video['fps'], output_size or (video['width'], video['height']))
+    written = 0
+    failed = False
+    try:
+        for index in range(len(series)):
+            ret, image = cap.read()
+            if not ret:
+                break
+            if output_size is not None:
+                image = cv2.resize(image, output_size, interpolation=cv2.INTER_AREA)
+
+            frame_state = {key: values[index] for key, values in frames.items()}
+            draw_fn(image, frame_landmarks(series, index), frame_state)
+            out.write(image)
+            written += 1
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        cap.release()
+        release_writer(out, suppress_errors=failed)
+    return written == len(series)
+
+
+def _render_segments(input_path, output_path, series, frames, draw_fn, output_profile, segments, progress=None):
+    """
+    Render every segment in a process pool and join the encoded parts without re-encoding.
+    progress is called once per finished segment. Returns False when a segment did not line up with
+    its frames or the parts could not be joined
+    """
+    bounds = [start for _, start, _ in segments] + [len(series)]
+    with tempfile.TemporaryDirectory() as segment_dir:
+        paths = [os.path.join(segment_dir, f"segment_{i}.mp4") for i in range(len(segments))]
+        with _process_pool(len(segments)) as pool:
+            futures = [
+                pool.submit(_render_segment, input_path, path, start, np.asarray(series[start:end]),
+                            {key: values[start:end] for key, values in frames.items()}, draw_fn, output_profile)
+                for path, start, end in zip(paths, bounds[:-1], bounds[1:])
+            ]
+            try:
+                for future, end in zip(futures, bounds[1:]):
+                    if not future.result():
+                        return False
+                    if progress is not None:
+                        progress('rendering', end, len(series))
+            finally:
+                for future in futures:
+                    future.cancel()
+
+        return concat_videos(paths, output_path)
+
+
+def render_video(input_path, output_path, series, frames, draw_fn, output_profile='full', workers=1,
+                 profiler=None, progress=None):
+    """
+    Second pass of the two-pass analysis: draw precomputed results on the decoded frames.
+
+    frames maps each state key to a per-frame array, so frame i is drawn with
+    {key: values[i]} and the landmarks stored in series[i]. With workers > 1 and ffmpeg available,
+    long videos are rendered in parallel segments that are joined afterwards.
+    progress(stage, frames_done, frame_count) is called as frames are written and may raise to stop.
+    """
+    cap, video = open_video(input_path)
+
+    segments = plan_segments(len(series), video['fps'], workers)
+    if len(segments) > 1 and ffmpeg_available():
+        cap.release()
+        with timed(profiler, 'render_segments'):
+            joined = _render_segments(input_path, output_path, series, frames, draw_fn, output_profile, segments,
+                                      progress)
+        if joined:
+            return
+        cap, video = open_video(input_path)
+
+    output_size = fit_size(video['width'], video['height'], OUTPUT_PROFILES[output_profile])
+    out = open_video_writer(output_path, video['fps'], output_size or (video['width'], video['height']))
+
+    decoded = queue.Queue(maxsize=QUEUE_SIZE)
+    stop_event = threading.Event()
+    errors = []
+    decoder = threading.Thread(target=_decode_stage,
+                               args=(cap, decoded, stop_event, errors, 1, output_size, profiler, True), daemon=True)
+
+    failed = False
+    try:
+        decoder.start()
+
+        while True:
+            item = _get(decoded, stop_event)
+
+            if item is _END:
+                break
+
+            frame_count, image = item
+            index = min(frame_count, len(series)) - 1
+            if index < 0:
+                break
+
+            frame_state = {key: values[index] for key, values in frames.items()}
+            with timed(profiler, 'draw'):
+                draw_fn(image, frame_landmarks(series, index), frame_state)
+            with timed(profiler, 'encode'):
+                out.write(image)
+            if profiler is not None:
+                profiler.frame_finished(frame_count)
+            if progress is not None:
+                progress('rendering', frame_count, len(series))
+    except BaseException:
+        failed = True
+        stop_event.set()
+        raise
+    finally:
+        stop_event.set()
+        decoder.join()
+        cap.release()
+        with timed(profiler, 'encode_flush'):
+            release_writer(out, suppress_errors=failed or bool(errors))
+
+    if errors:
+        raise errors[0]
+
+
+def landmark_cache_key(input_path, content_hash=None, analysis_fps=None):
+    """Cache key for the landmarks of a video, hashing the file unless its content hash is already known"""
+    settings = dict(POSE_SETTINGS, analysis_fps=analysis_fps, inference_max_side=INFERENCE_MAX_SIDE)
+    return cache_key(content_hash or hash_file(input_path), settings)
+
+
+def analyze_landmarks(series, video, analyze_fn):
+    """
+    Run the vectorized rep analysis on the sampled frames of a landmark series.
+    Rep counting only sees the frames that went through pose estimation, so interpolated frames
+    never add stage transitions; the result is then expanded to every frame.
+    """
+    stride = video.get('stride', 1)
+    if stride == 1:
+        return analyze_fn(series)
+
+    sampled = sample_frames(len(series), stride)
+    return expand_to_frames(analyze_fn(series[sampled]), sampled, len(series))
+
+
+def _lookup_landmarks(input_path, content_hash, use_cache, analysis_fps, profiler):
+    """Returns tuple of (key, cached) where cached is (series, video) on a landmark cache hit, else None"""
+    with timed(profiler, 'cache_lookup'):
+        key = landmark_cache_key(input_path, content_hash, analysis_fps) if use_cache else None
+        return key, load_landmarks(key) if key else None
+
+
+def _extract_and_cache(input_path, key, analysis_fps, workers, profiler, progress):
+    series, video = extract_landmarks(input_path, analysis_fps, workers, profiler, progress)
+    if key:
+        with timed(profiler, 'cache_save'):
+            save_landmarks(key, series, video)
+    return series, video
+
+
+def landmark_series(input_path, content_hash=None, use_cache=True, analysis_fps=DEFAULT_ANALYSIS_FPS, workers=1,
+                    profiler=None, progress=None):
+    """
+    Landmark series of a video from the cache, or from one pose estimation pass that is then cached.
+    Arguments are as for process_exercise. Returns tuple of (series, video, cached)
+    """
+    key, cached = _lookup_landmarks(input_path, content_hash, use_cache, analysis_fps, profiler)
+    if cached is not None:
+        return cached[0], cached[1], True
+    return (*_extract_and_cache(input_path, key, analysis_fps, workers, profiler, progress), False)
+
+
+def process_exercise(input_path, output_path, record, exercise, two_pass=False, content_hash=None,
+                     use_cache=True, analysis_fps=DEFAULT_ANALYSIS_FPS, output_profile='full', workers=1,
+                     profiler=None, progress=None):
+    """
+    Analyse a video and render the annotated output for one exercise.
+
+    exercise is a compiled exercise from rep_engine.compile_exercise: its init_state, update_state,
+    analyze_series and draw_frame hooks and its record layout; record is an optional FrameRecordWriter for that exercise that gets every frame's row.
+    With two_pass=True, or whenever the landmarks of this video are already cached, the landmark series
+    is analysed first and the output is rendered afterwards; a cache hit skips pose inference entirely.
+    analysis_fps caps the pose sampling rate (None analyses every frame), output_profile selects the
+    output resolution from OUTPUT_PROFILES. With workers > 1 long videos are processed in parallel
+    segments; reps are always counted on the merged series, so a rep spanning a segment boundary
+    is counted once. profiler is an optional JobProfiler that times every stage of the job.
+    progress(stage, frames_done, frame_count) reports how far the current stage ('processing' for the
+    streaming pipeline, 'landmarks' then 'rendering' otherwise) got; an exception it raises cancels the job.
+    Returns dict with the 'frame_count', the 'reps' and whether the landmarks were cached ('landmarks_cached')
+    """
+    if workers > 1:
+        # Short videos are not split, they go through the streaming pipeline as usual
+        cap, video = open_video(input_path)
+        cap.release()
+        workers = len(plan_segments(video['frame_count'], video['fps'], workers))
+
+    key, cached = _lookup_landmarks(input_path, content_hash, use_cache, analysis_fps, profiler)
+
+    if cached is not None or two_pass or workers > 1:
+        if cached is not None:
+            series, video = cached
+        else:
+            series, video = _extract_and_cache(input_path, key, analysis_fps, workers, profiler, progress)
+
+        with timed(profiler, 'rep_analysis'):
+            analysis = analyze_landmarks(series, video, exercise['analyze_series'])
+            summary = summarize_reps(analysis, video)
+        if record is not None:
+            record.extend(video, analysis['frames'], series)
+        render_video(input_path, output_path, series, analysis['frames'], exercise['draw_frame'], output_profile,
+                     workers, profiler, progress)
+        return {'frame_count': summary['frame_count'], 'reps': summary['reps'], 'landmarks_cached': cached is not None}
+
+    state, series, video = run_pipeline(input_path, output_path, exercise['init_state'](),
+                                        exercise['update_state'], exercise['draw_frame'], record,
+                                        analysis_fps, output_profile, profiler, progress)
+    if key:
+        with timed(profiler, 'cache_save'):
+            save_landmarks(key, series, video)
+    return {'frame_count': len(series), 'reps': state['counter'], 'landmarks_cached': False}
+
+
+def process_upload(exercise, input_path, two_pass=False, content_hash=None, analysis_fps=DEFAULT_ANALYSIS_FPS,
+                   output_profile='full', workers=1, profiler=None, progress=None):
+    """
+    Run process_exercise for a compiled exercise, writing the output video, the per-frame record and
+    the JSON summary to temporary files. The caller owns the files; they are removed if processing fails.
+    With two_pass=True the landmarks are extracted first and reps are counted on the whole series
+    before the output video is rendered. Cached landmarks for the same content_hash (or file content)
+    skip pose estimation. Pose estimation runs at most analysis_fps times per second of video
+    (None for every frame). output_profile 'preview' renders a downscaled output video.
+    workers > 1 splits long videos into segments processed in parallel worker processes.
+    With a JobProfiler passed as profiler, its timing and memory report is added to the summary.
+    progress(stage, frames_done, frame_count) is called as frames are processed and may raise to cancel.
+    Per-frame results go to a binary record and a JSON summary, see analysis_record.load_record.
+    Returns tuple of (processed_video_path, summary_path, record_path)
+    """
+    temp_video = tempfile.NamedTemporaryFile(delete=False, suffix='.mp4')
+    temp_record = tempfile.NamedTemporaryFile(delete=False, suffix='.bin')
+    temp_summary = tempfile.NamedTemporaryFile(delete=False, suffix='.json')
+    for temp_file in (temp_video, temp_record, temp_summary):
+        temp_file.close()
+
+    try:
+        started = datetime.now()
+        with FrameRecordWriter(temp_record.name, exercise) as record:
+            result = process_exercise(input_path, temp_video.name, record, exercise, two_pass=two_pass,
+                                      content_hash=content_hash, analysis_fps=analysis_fps,
+                                      output_profile=output_profile, workers=workers, profiler=profiler,
+                                      progress=progress)
+
+        summary = build_summary(exercise['name'], record, result, started, profiler, exercise['form_notes'])
+        write_summary(temp_summary.name, summary)
+        return temp_video.name, temp_summary.name, temp_record.name
+
+    except BaseException:
+        for path in (temp_video.name, temp_record.name, temp_summary.name):
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        raise
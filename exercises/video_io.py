@@ -0,0 +1,264 @@
+import json
+import logging
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Fallback frame rate when the container does not report one
+DEFAULT_FPS = 30
+
+
+class FFmpegWriter:
+    """
+    Stream BGR frames into a persistent ffmpeg libx264 process.
+    Has the same write/release interface as cv2.VideoWriter, but the output is browser-playable H.264
+    """
+
+    def __init__(self, output_path, fps, frame_size):
+        width, height = frame_size
+        command = [
+            "ffmpeg",
+            "-y",
+            "-loglevel", "error",
+            "-f", "rawvideo",
+            "-pix_fmt", "bgr24",
+            "-s", f"{width}x{height}",
+            "-r", str(fps or DEFAULT_FPS),
+            "-i", "-",
+            "-an",
+            # yuv420p needs even dimensions
+            "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+            "-vcodec", "libx264",
+            "-preset", "veryfast",
+            "-pix_fmt", "yuv420p",
+            "-movflags", "+faststart",
+            output_path
+        ]
+        self.output_path = output_path
+        self._stderr = tempfile.TemporaryFile()
+        self._process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=self._stderr)
+
+    def write(self, frame):
+        """Send one BGR frame to the encoder"""
+        self._process.stdin.write(np.ascontiguousarray(frame).data)
+
+    def release(self, suppress_errors=False):
+        """
+        Flush the encoder and wait for the output file to be finalized. Raises RuntimeError when ffmpeg fails.
+        Callers releasing while another error is on its way out pass suppress_errors=True, which logs the
+        ffmpeg error instead so it does not replace the original one
+        """
+        if self._process.stdin.closed:
+            return
+        try:
+            self._process.stdin.close()
+        except BrokenPipeError:
+            pass
+        self._process.wait()
+
+        self._stderr.seek(0)
+        error = self._stderr.read().decode(errors='replace').strip()
+        self._stderr.close()
+        if self._process.returncode != 0:
+            if suppress_errors:
+                logger.error("ffmpeg encoding of %s failed: %s", self.output_path, error)
+                return
+            raise RuntimeError(f"ffmpeg encoding failed: {error}")
+
+
+def ffmpeg_available():
+    """Check whether the ffmpeg binary is on the PATH"""
+    return shutil.which("ffmpeg") is not None
+
+
+def release_writer(out, suppress_errors=False):
+    """Release a writer from open_video_writer, see FFmpegWriter.release for suppress_errors"""
+    if isinstance(out, FFmpegWriter):
+        out.release(suppress_errors)
+    else:
+        out.release()
+
+
+def open_video_writer(output_path, fps, frame_size):
+    """
+    Open the writer for a processed video: H.264 through ffmpeg when available,
+    otherwise an mp4v cv2.VideoWriter
+    """
+    if ffmpeg_available():
+        return FFmpegWriter(output_path, fps, frame_size)
+
+    # Imported here so the ffmpeg-only helpers, like prepare_for_browser for the demo videos, do not load OpenCV
+    import cv2
+    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+    return cv2.VideoWriter(output_path, fourcc, fps, frame_size)
+
+
+# Codecs every mainstream browser plays inside an MP4 container
+BROWSER_VIDEO_CODECS = {'h264'}
+BROWSER_AUDIO_CODECS = {'aac', 'mp3'}
+BROWSER_PIXEL_FORMATS = {'yuv420p', 'yuvj420p'}
+
+
+def probe_video(input_path):
+    """
+    Read container and codec information with ffprobe.
+    Returns dict with container, video_codec, pixel_format and audio_codec, or None if probing fails
+    """
+    command = [
+        "ffprobe",
+        "-v", "error",
+        "-print_format", "json",
+        "-show_format",
+        "-show_streams",
+        input_path
+    ]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, check=True)
+        info = json.loads(result.stdout)
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return None
+
+    video = next((s for s in info.get('streams', []) if s.get('codec_type') == 'video'), {})
+    audio = next((s for s in info.get('streams', []) if s.get('codec_type') == 'audio'), {})
+    return {
+        'container': info.get('format', {}).get('format_name', ''),
+        'video_codec': video.get('codec_name'),
+        'pixel_format': video.get('pix_fmt'),
+        'audio_codec': audio.get('codec_name')
+    }
+
+
+def is_browser_compatible(probe):
+    """Check whether the streams can be played by a browser without re-encoding"""
+    return (probe is not None
+            and probe['video_codec'] in BROWSER_VIDEO_CODECS
+            and probe['pixel_format'] in BROWSER_PIXEL_FORMATS
+            and (probe['audio_codec'] is None or probe['audio_codec'] in BROWSER_AUDIO_CODECS))
+
+
+def _top_level_atoms(input_path):
+    """List the top-level MP4/MOV atom types in file order"""
+    atoms = []
+    with open(input_path, 'rb') as f:
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                break
+            size = struct.unpack('>I', header[:4])[0]
+            atoms.append(header[4:8])
+            if size == 1:
+                size = struct.unpack('>Q', f.read(8))[0]
+                if size < 16:
+                    break
+                f.seek(size - 16, os.SEEK_CUR)
+            elif size < 8:
+                # 0 means the atom runs to the end of the file, anything else is malformed
+                break
+            else:
+                f.seek(size - 8, os.SEEK_CUR)
+    return atoms
+
+
+def is_faststart_mp4(input_path, probe):
+    """Check whether the file is an MP4 whose moov atom comes before the media data"""
+    if 'mp4' not in probe['container'].split(','):
+        return False
+    try:
+        atoms = _top_level_atoms(input_path)
+    except (OSError, struct.error):
+        return False
+    if atoms[:1] != [b'ftyp'] or b'moov' not in atoms:
+        return False
+    return b'mdat' not in atoms or atoms.index(b'moov') < atoms.index(b'mdat')
+
+
+def remux_faststart(input_path, output_path):
+    """Copy the streams into a faststart MP4 without re-encoding"""
+    command = [
+        "ffmpeg",
+        "-y",
+        "-loglevel", "error",
+        "-i", input_path,
+        "-c", "copy",
+        "-movflags", "+faststart",
+        output_path
+    ]
+    try:
+        subprocess.run(command, check=True, capture_output=True)
+        return True
+    except (OSError, subprocess.CalledProcessError):
+        return False
+
+
+def concat_videos(input_paths, output_path):
+    """Join MP4 segments encoded with identical settings into one faststart MP4 without re-encoding"""
+    fd, list_path = tempfile.mkstemp(suffix='.txt')
+    with os.fdopen(fd, 'w') as f:
+        for path in input_paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+
+    command = [
+        "ffmpeg",
+        "-y",
+        "-loglevel", "error",
+        "-f", "concat",
+        "-safe", "0",
+        "-i", list_path,
+        "-c", "copy",
+        "-movflags", "+faststart",
+        output_path
+    ]
+    try:
+        subprocess.run(command, check=True, capture_output=True)
+        return True
+    except (OSError, subprocess.CalledProcessError):
+        return False
+    finally:
+        os.remove(list_path)
+
+
+def transcode_to_h264(input_path, output_path):
+    """Re-encode a video to H.264/AAC"""
+    command = [
+        "ffmpeg",
+        "-y",
+        "-i", input_path,
+        "-vcodec", "libx264",
+        "-acodec", "aac",
+        "-pix_fmt", "yuv420p",
+        "-movflags", "+faststart",
+        output_path
+    ]
+    try:
+        subprocess.run(command, check=True, capture_output=True)
+        return True
+    except (OSError, subprocess.CalledProcessError):
+        return False
+
+
+def prepare_for_browser(input_path, output_path):
+    """
+    Make a video playable in the browser with as little work as possible:
+    serve it as-is when it already is a faststart H.264 MP4, stream-copy it into a faststart MP4
+    when only the container needs fixing, and transcode only when the codecs are not supported.
+    Returns tuple of (playable_path, action) with action 'original', 'remux' or 'transcode',
+    or (None, action) when ffmpeg failed
+    """
+    probe = probe_video(input_path)
+
+    if is_browser_compatible(probe):
+        if is_faststart_mp4(input_path, probe):
+            return input_path, 'original'
+        if remux_faststart(input_path, output_path):
+            return output_path, 'remux'
+
+    if transcode_to_h264(input_path, output_path):
+        return output_path, 'transcode'
+    return None, 'transcode'
@@ -0,0 +1,67 @@
+import types
+
+import numpy as np
+import pytest
+
+CLIP_FPS = 30
+CLIP_SIZE = (64, 48)
+
+
+class StubPose:
+    """
+    Stand-in for a MediaPipe Pose graph that reads the landmarks off the frame: every test clip frame
+    is one flat gray level, which becomes the angle of the left elbow, so results follow the frame
+    content exactly and do not depend on a model
+    """
+
+    def __init__(self, **settings):
+        self.settings = settings
+        self.closed = False
+
+    def process(self, image):
+        level = float(image.mean())
+        angle = np.radians(10 + 170 * min(level, 200) / 200)
+        points = [(0.5, 0.5)] * 33
+        # Shoulder, elbow and wrist of the left arm, hip below the shoulder
+        points[11], points[13], points[23] = (0.5, 0.3), (0.5, 0.5), (0.5, 0.8)
+        points[15] = (0.5 + 0.2 * np.sin(angle), 0.5 - 0.2 * np.cos(angle))
+        landmarks = [types.SimpleNamespace(x=x, y=y, z=0.0, visibility=0.9) for x, y in points]
+        return types.SimpleNamespace(pose_landmarks=types.SimpleNamespace(landmark=landmarks))
+
+    def reset(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+@pytest.fixture
+def stub_pose(monkeypatch):
+    """Replace the pose model with StubPose in a fresh pool. Returns the pool"""
+    pytest.importorskip('mediapipe')
+    from exercises import live_capture, pose_pool, video_engine
+
+    stub = types.SimpleNamespace(Pose=StubPose)
+    monkeypatch.setattr(pose_pool, 'mp_pose', stub)
+    monkeypatch.setattr(video_engine, 'mp_pose', stub)
+    pool = pose_pool.PosePool()
+    monkeypatch.setattr(pose_pool, 'POSE_POOL', pool)
+    monkeypatch.setattr(video_engine, 'POSE_POOL', pool)
+    monkeypatch.setattr(live_capture, 'POSE_POOL', pool)
+    return pool
+
+
+def write_clip(path, levels, fps=CLIP_FPS, size=CLIP_SIZE):
+    """Write a clip whose frames are flat gray at the given levels"""
+    cv2 = pytest.importorskip('cv2')
+    out = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+    for level in levels:
+        out.write(np.full((size[1], size[0], 3), level, dtype=np.uint8))
+    out.release()
+    return str(path)
@@ -0,0 +1,146 @@
+import hashlib
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+pytest.importorskip('requests')
+
+from exercises import demo_assets
+
+DATA = bytes(range(256)) * 256  # 64 KiB
+
+
+class DriveStandIn(BaseHTTPRequestHandler):
+    """Serves ?id=<file id> from server.files with Range support, like Drive's download endpoint"""
+
+    def do_GET(self):
+        server = self.server
+        file_id = parse_qs(urlparse(self.path).query)['id'][0]
+        data = server.files[file_id]
+        requested = self.headers.get('Range')
+        server.requests.append((file_id, requested))
+
+        start = 0
+        if requested and not server.ignore_range:
+            start = int(re.match(r'bytes=(\d+)-', requested).group(1))
+            if start >= len(data):
+                self.send_response(416)
+                self.send_header('Content-Range', f"bytes */{len(data)}")
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f"bytes {start}-{len(data) - 1}/{len(data)}")
+        else:
+            self.send_response(200)
+        body = data[start:]
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+
+        if server.cut_after is not None:
+            # Drop the connection part way through, once
+            cut_after, server.cut_after = server.cut_after, None
+            self.wfile.write(body[:cut_after])
+            self.wfile.flush()
+            self.connection.close()
+            return
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def drive():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), DriveStandIn)
+    server.files = {'FILE': DATA}
+    server.requests = []
+    server.cut_after = None
+    server.ignore_range = False
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/uc"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def session():
+    with demo_assets.open_session() as session:
+        yield session
+
+
+def download(drive, session, path, **kwargs):
+    return demo_assets.download_resumable(session, f"{drive.url}?id=FILE&export=download", path, **kwargs)
+
+
+def test_interrupted_download_resumes_with_range(drive, session, tmp_path, monkeypatch):
+    monkeypatch.setattr(demo_assets, 'DOWNLOAD_CHUNK_SIZE', 1024)
+    drive.cut_after = 20000
+    path = download(drive, session, tmp_path / 'demo.mp4')
+
+    assert path.read_bytes() == DATA
+    assert not (tmp_path / 'demo.mp4.part').exists()
+    (_, first), (_, second) = drive.requests
+    assert first is None
+    assert 0 < int(re.match(r'bytes=(\d+)-', second).group(1)) <= 20000
+
+
+def test_part_file_left_by_a_crash_is_resumed(drive, session, tmp_path):
+    (tmp_path / 'demo.mp4.part').write_bytes(DATA[:30000])
+    path = download(drive, session, tmp_path / 'demo.mp4')
+
+    assert path.read_bytes() == DATA
+    assert drive.requests == [('FILE', 'bytes=30000-')]
+
+
+def test_complete_part_file_is_accepted_on_416(drive, session, tmp_path):
+    (tmp_path / 'demo.mp4.part').write_bytes(DATA)
+    path = download(drive, session, tmp_path / 'demo.mp4')
+
+    assert path.read_bytes() == DATA
+    assert drive.requests == [('FILE', f"bytes={len(DATA)}-")]
+
+
+def test_part_file_longer_than_the_source_starts_over(drive, session, tmp_path):
+    (tmp_path / 'demo.mp4.part').write_bytes(DATA + b'stale')
+    path = download(drive, session, tmp_path / 'demo.mp4')
+
+    assert path.read_bytes() == DATA
+    assert [requested for _, requested in drive.requests] == [f"bytes={len(DATA) + 5}-", None]
+
+
+def test_ignored_range_rewrites_the_part_file(drive, session, tmp_path):
+    drive.ignore_range = True
+    (tmp_path / 'demo.mp4.part').write_bytes(DATA[:1000])
+    path = download(drive, session, tmp_path / 'demo.mp4')
+
+    assert path.read_bytes() == DATA
+
+
+def test_pinned_checksum_is_verified(drive, session, tmp_path):
+    path = download(drive, session, tmp_path / 'demo.mp4', expected_sha256=hashlib.sha256(DATA).hexdigest())
+    assert path.read_bytes() == DATA
+
+
+def test_checksum_mismatch_discards_the_download(drive, session, tmp_path):
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        download(drive, session, tmp_path / 'demo.mp4', expected_sha256='0' * 64)
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_fetch_demo_downloads_from_the_configured_endpoint(drive, session, tmp_path, monkeypatch):
+    monkeypatch.setattr(demo_assets, 'DRIVE_DOWNLOAD_URL', drive.url)
+    monkeypatch.setattr(demo_assets, 'prepare_for_browser', lambda source, converted: (source, 'original'))
+    demo = {'url': 'https://drive.google.com/file/d/FILE/view?usp=sharing',
+            'sha256': hashlib.sha256(DATA).hexdigest()}
+
+    playable = demo_assets.fetch_demo(session, 'pushup', demo, tmp_path)
+
+    assert open(playable, 'rb').read() == DATA
+    assert drive.requests == [('FILE', None)]
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('cv2')
+pytest.importorskip('mediapipe')
+
+from exercises.live_capture import live_exercise_frames
+from exercises.pose_pool import POSE_SETTINGS, PoseEngineBusy
+from exercises.rep_engine import EXERCISES
+
+from conftest import write_clip
+
+# Slower than the camera rate, so the loop keeps up with the paced file and no frame is dropped
+FPS = 20
+FRAMES = 40
+
+
+@pytest.fixture
+def two_pushups(tmp_path):
+    """Elbow extended, bent, extended, bent and extended again through the stub pose graph"""
+    levels = [round(100 + 100 * np.cos(2 * np.pi * i / 20)) for i in range(FRAMES)]
+    return write_clip(tmp_path / 'pushups.mp4', levels, fps=FPS)
+
+
+def test_live_loop_counts_reps_from_a_video_file(stub_pose, two_pushups):
+    frames = live_exercise_frames(EXERCISES['pushup'], two_pushups)
+    try:
+        results = list(frames)
+    finally:
+        frames.close()
+
+    assert len(results) == FRAMES
+    image, state = results[-1]
+    assert image.shape == (48, 64, 3)
+    assert state['counter'] == 2
+    assert state['stage'] == 'down'
+    assert [state['counter'] for _, state in results] == sorted(state['counter'] for _, state in results)
+    assert all(state['latency_ms'] >= 0 for _, state in results)
+
+
+def test_closing_the_live_loop_returns_its_graph(stub_pose, two_pushups):
+    stub_pose.size = 1
+    frames = live_exercise_frames(EXERCISES['pushup'], two_pushups)
+    next(frames)
+    with pytest.raises(PoseEngineBusy):
+        with stub_pose.checkout(POSE_SETTINGS, timeout=0.05):
+            pass
+
+    frames.close()
+    with stub_pose.checkout(POSE_SETTINGS, timeout=0.05) as pose:
+        assert not pose.closed
@@ -0,0 +1,27 @@
+import pytest
+
+pytest.importorskip('mediapipe')
+
+from exercises.pose_pool import POSE_SETTINGS, PoseEngineBusy, PosePool
+
+
+def test_checkout_gives_up_when_every_graph_is_held(stub_pose):
+    pool = PosePool(size=1)
+    with pool.checkout(POSE_SETTINGS):
+        with pytest.raises(PoseEngineBusy, match="busy"):
+            with pool.checkout(POSE_SETTINGS, timeout=0.05):
+                pass
+
+    with pool.checkout(POSE_SETTINGS, timeout=0.05) as pose:
+        assert pose is not None
+
+
+def test_failed_checkout_does_not_take_a_slot(stub_pose):
+    pool = PosePool(size=1)
+    with pool.checkout(POSE_SETTINGS) as held:
+        with pytest.raises(PoseEngineBusy):
+            with pool.checkout(POSE_SETTINGS, timeout=0.05):
+                pass
+
+    with pool.checkout(POSE_SETTINGS, timeout=0.05) as pose:
+        assert pose is held
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('cv2')
+pytest.importorskip('mediapipe')
+
+from exercises.landmarks import X, frame_landmarks
+from exercises.rep_engine import EXERCISES
+from exercises.specs import EXERCISE_SPECS
+
+FRAMES = 4000
+
+
+def random_series(seed):
+    """
+    Landmarks wandering smoothly so the joint angles sweep through every band, with frames without
+    a pose and frames where single landmarks are missing
+    """
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(scale=0.01, size=(FRAMES, 33, 2))
+    positions = 0.5 + 0.3 * np.sin(np.cumsum(steps, axis=0) * 3 + rng.uniform(0, 2 * np.pi, size=(33, 2)))
+    series = np.concatenate([positions, np.zeros((FRAMES, 33, 1)), np.full((FRAMES, 33, 1), 0.9)], axis=2)
+    series = series.astype(np.float32)
+
+    series[rng.random(FRAMES) < 0.05] = np.nan
+    partial = np.flatnonzero(rng.random(FRAMES) < 0.05)
+    series[partial, rng.integers(1, 33, size=len(partial)), X] = np.nan
+    return series
+
+
+@pytest.mark.parametrize('name', list(EXERCISE_SPECS))
+def test_series_analysis_matches_the_per_frame_kernel(name):
+    exercise = EXERCISES[name]
+    reps = 0
+    for seed in range(3):
+        series = random_series(seed)
+        frames = exercise['analyze_series'](series)['frames']
+
+        state = exercise['init_state']()
+        for index in range(FRAMES):
+            exercise['update_state'](state, frame_landmarks(series, index), index + 1)
+            for key, values in frames.items():
+                expected = state[key]
+                if isinstance(expected, str) or expected is None:
+                    assert values[index] == expected, (key, seed, index)
+                else:
+                    np.testing.assert_allclose(values[index], expected, rtol=1e-5,
+                                               err_msg=f"{key} at frame {index} of seed {seed}")
+        reps += frames['counter'][-1]
+
+    # The series must reach the rep transitions for the comparison to cover them
+    assert reps > 0
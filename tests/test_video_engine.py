@@ -0,0 +1,77 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+pytest.importorskip('cv2')
+pytest.importorskip('mediapipe')
+
+from exercises import video_engine
+
+from conftest import write_clip
+
+FRAMES = 90
+
+
+@pytest.fixture
+def segmented(stub_pose, monkeypatch, tmp_path):
+    """A clip long enough for three segments, with the segment workers run as threads so they see the stub"""
+    monkeypatch.setattr(video_engine, 'SEGMENT_MIN_SECONDS', 1)
+    monkeypatch.setattr(video_engine, '_process_pool', lambda workers: ThreadPoolExecutor(max_workers=workers))
+    return write_clip(tmp_path / 'clip.mp4', [20 + 2 * i for i in range(FRAMES)])
+
+
+def test_segments_match_a_sequential_extraction(segmented):
+    sequential, _ = video_engine.extract_landmarks(segmented, workers=1)
+    parallel, _ = video_engine.extract_landmarks(segmented, workers=3)
+
+    assert len(video_engine.plan_segments(FRAMES, 30, 3)) == 3
+    assert sequential.shape == (FRAMES, 33, 4)
+    np.testing.assert_array_equal(parallel, sequential)
+
+
+def test_segments_match_a_sequential_extraction_with_a_stride(segmented):
+    sequential, _ = video_engine.extract_landmarks(segmented, analysis_fps=10, workers=1)
+    parallel, _ = video_engine.extract_landmarks(segmented, analysis_fps=10, workers=3)
+
+    np.testing.assert_array_equal(parallel, sequential)
+
+
+def test_missed_seek_falls_back_to_a_sequential_extraction(segmented, monkeypatch):
+    sequential, _ = video_engine.extract_landmarks(segmented, workers=1)
+    monkeypatch.setattr(video_engine, '_seek', lambda cap, frame: frame == 0)
+    parallel, _ = video_engine.extract_landmarks(segmented, workers=3)
+
+    np.testing.assert_array_equal(parallel, sequential)
+
+
+def test_short_segment_falls_back_to_a_sequential_extraction(segmented, monkeypatch):
+    sequential, _ = video_engine.extract_landmarks(segmented, workers=1)
+    extract_segment = video_engine._extract_segment
+
+    def short_read(input_path, warm_start, start, end, *args):
+        # The middle segment stops a few frames early
+        if start and end is not None:
+            end -= 5
+        return extract_segment(input_path, warm_start, start, end, *args)
+
+    monkeypatch.setattr(video_engine, '_extract_segment', short_read)
+    parallel, _ = video_engine.extract_landmarks(segmented, workers=3)
+
+    np.testing.assert_array_equal(parallel, sequential)
+
+
+def test_missed_seek_falls_back_to_a_sequential_render(segmented, monkeypatch, tmp_path):
+    if not video_engine.ffmpeg_available():
+        pytest.skip("segments are only rendered in parallel with ffmpeg")
+    cv2 = pytest.importorskip('cv2')
+    series, _ = video_engine.extract_landmarks(segmented, workers=1)
+    monkeypatch.setattr(video_engine, '_seek', lambda cap, frame: frame == 0)
+
+    output_path = str(tmp_path / 'rendered.mp4')
+    video_engine.render_video(segmented, output_path, series, {}, lambda image, landmarks, state: None,
+                              workers=3)
+
+    cap = cv2.VideoCapture(output_path)
+    assert int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) == FRAMES
+    cap.release()
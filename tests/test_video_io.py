@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from exercises import video_io
+
+pytestmark = pytest.mark.skipif(not video_io.ffmpeg_available(), reason="needs ffmpeg")
+
+
+def failing_writer(tmp_path):
+    """A writer whose ffmpeg exits with an error, as its output directory does not exist"""
+    writer = video_io.FFmpegWriter(str(tmp_path / 'missing' / 'out.mp4'), 30, (64, 48))
+    try:
+        writer.write(np.zeros((48, 64, 3), dtype=np.uint8))
+    except BrokenPipeError:
+        pass
+    return writer
+
+
+def test_release_raises_when_ffmpeg_fails(tmp_path):
+    with pytest.raises(RuntimeError, match="ffmpeg encoding failed"):
+        video_io.release_writer(failing_writer(tmp_path))
+
+
+def test_release_raises_inside_an_unrelated_except_block(tmp_path):
+    writer = failing_writer(tmp_path)
+    try:
+        raise KeyError('handled')
+    except KeyError:
+        with pytest.raises(RuntimeError, match="ffmpeg encoding failed"):
+            video_io.release_writer(writer)
+
+
+def test_suppressed_release_logs_instead_of_replacing_the_error(tmp_path, caplog):
+    video_io.release_writer(failing_writer(tmp_path), suppress_errors=True)
+    assert "ffmpeg encoding of" in caplog.text